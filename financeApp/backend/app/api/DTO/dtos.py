@@ -1,14 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import date
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 # =========================
 # User DTOs
 # =========================
 class UserDTOPetition(BaseModel):
-    full_name: str
+    full_name: str = Field(max_length=100)
     birth_date: date
-    location: str
+    location: str = Field(max_length=100)
     savings_goal: float
     password: str
 
@@ -38,8 +38,8 @@ class UserDTOResponse(BaseModel):
 # Expense DTOs
 # =========================
 class ExpenseDTOPetition(BaseModel):
-    description: str
-    category: str
+    description: str = Field(max_length=255)
+    category: str = Field(max_length=100)
     amount: float
     date: date
 
@@ -50,6 +50,7 @@ class ExpenseDTOResponse(BaseModel):
     id: int
     description: str
     category: str
+    category_id: Optional[int] = None
     amount: float
     date: date
     user_id: int
@@ -57,11 +58,15 @@ class ExpenseDTOResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ExpensePageDTO(BaseModel):
+    items: List[ExpenseDTOResponse]
+    next_cursor: Optional[str] = None
+
 # =========================
 # Income DTOs
 # =========================
 class IncomeDTOPetition(BaseModel):
-    description: str
+    description: str = Field(max_length=255)
     amount: float
     date: date
 
@@ -78,12 +83,16 @@ class IncomeDTOResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class IncomePageDTO(BaseModel):
+    items: List[IncomeDTOResponse]
+    next_cursor: Optional[str] = None
+
 # =========================
 # Category DTOs
 # =========================
 class CategoryDTOPetition(BaseModel):
-    name: str
-    description: Optional[str] = None
+    name: str = Field(max_length=100)
+    description: Optional[str] = Field(None, max_length=255)
     value: float
     date: date
 
@@ -96,11 +105,131 @@ class CategoryDTOResponse(BaseModel):
     description: Optional[str] = None
     value: float
     date: date
+    user_id: Optional[int] = None  # None for global categories
+
+    class Config:
+        from_attributes = True
+
+class CategoryPageDTO(BaseModel):
+    items: List[CategoryDTOResponse]
+    next_cursor: Optional[str] = None
+
+# =========================
+# Recurring Rule DTOs
+# =========================
+class RecurringRuleDTOPetition(BaseModel):
+    kind: Literal["expense", "income"]
+    description: str = Field(max_length=255)
+    category: Optional[str] = Field(None, max_length=100)
+    amount: float
+    frequency: Literal["daily", "weekly", "monthly", "yearly"]
+    start_date: date
+    end_date: Optional[date] = None
+    active: bool = True
+
+    @model_validator(mode="after")
+    def check_rule(self):
+        if self.kind == "expense" and not self.category:
+            raise ValueError("category is required for expense rules")
+        if self.end_date is not None and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+    class Config:
+        from_attributes = True
+
+class RecurringRuleDTOResponse(BaseModel):
+    id: int
+    kind: str
+    description: str
+    category: Optional[str] = None
+    amount: float
+    frequency: str
+    start_date: date
+    end_date: Optional[date] = None
+    next_run: date
+    active: bool
     user_id: int
 
     class Config:
         from_attributes = True
 
+class RecurringRulePageDTO(BaseModel):
+    items: List[RecurringRuleDTOResponse]
+    next_cursor: Optional[str] = None
+
+# =========================
+# Bulk import DTOs
+# =========================
+class BulkRowErrorDTO(BaseModel):
+    row: int
+    error: str
+
+class BulkImportDTOResponse(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkRowErrorDTO] = []
+
+# =========================
+# Batch DTOs
+# =========================
+class BatchOperationDTO(BaseModel):
+    op: Literal["create", "update", "delete"]
+    resource: Literal["expense", "income", "category"]
+    id: Optional[int] = None  # required for update / delete
+    data: Optional[Dict[str, Any]] = None  # petition fields for create / update
+
+class BatchDTOPetition(BaseModel):
+    operations: List[BatchOperationDTO]
+
+class BatchResultDTO(BaseModel):
+    op: str
+    resource: str
+    id: int
+    item: Optional[Dict[str, Any]] = None  # None for deletes
+
+class BatchDTOResponse(BaseModel):
+    results: List[BatchResultDTO]
+
+# =========================
+# Analytics DTOs
+# =========================
+class MonthlySummaryDTO(BaseModel):
+    month: date
+    total_expenses: float
+    total_incomes: float
+    balance: float
+    running_balance: float
+    savings_progress: float
+    expenses_by_category: Dict[str, float] = {}
+
+class AnalyticsSummaryDTO(BaseModel):
+    savings_goal: float
+    total_expenses: float
+    total_incomes: float
+    balance: float
+    expenses_by_category: Dict[str, float] = {}
+    months: List[MonthlySummaryDTO] = []
+
+# =========================
+# Search DTOs
+# =========================
+class SearchResultDTO(BaseModel):
+    kind: str  # "expense" | "income"
+    id: int
+    description: str
+    category: Optional[str] = None
+    amount: float
+    date: date
+    score: float
+
+    class Config:
+        from_attributes = True
+
+class SearchPageDTO(BaseModel):
+    items: List[SearchResultDTO]
+    next_cursor: Optional[str] = None
+
 # =========================
 # Auth DTOs
 # =========================
@@ -113,4 +242,13 @@ class TokenDTO(BaseModel):
     token_type: str = "bearer"
 
 class TokenData(BaseModel):
+    user_id: Optional[int] = None
     username: Optional[str] = None
+
+class CurrentUserDTO(BaseModel):
+    """Identity resolved from the access token, without loading the ORM User"""
+    id: int
+    full_name: str
+
+    class Config:
+        frozen = True
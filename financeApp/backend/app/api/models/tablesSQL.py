@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Boolean, Index, Text, UniqueConstraint, select, func
+from sqlalchemy.orm import relationship, column_property
 from app.dataBase.configuration import Base
-from datetime import date
+from datetime import date, datetime
 
 # =========================
 # User Table
@@ -10,7 +10,7 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    full_name = Column(String(100), nullable=False)
+    full_name = Column(String(100), nullable=False, index=True)
     birth_date = Column(Date, nullable=False)
     location = Column(String(100), nullable=False)
     savings_goal = Column(Float, nullable=False)
@@ -20,16 +20,9 @@ class User(Base):
     expenses = relationship("Expense", back_populates="user", cascade="all, delete-orphan")
     incomes = relationship("Income", back_populates="user", cascade="all, delete-orphan")
     categories = relationship("Category", back_populates="user", cascade="all, delete-orphan")
+    recurring_rules = relationship("RecurringRule", back_populates="user", cascade="all, delete-orphan")
 
-    # Computed properties
-    @property
-    def total_expenses(self) -> float:
-        return sum(exp.amount for exp in self.expenses) if self.expenses else 0.0
-
-    @property
-    def total_incomes(self) -> float:
-        return sum(inc.amount for inc in self.incomes) if self.incomes else 0.0
-
+    # Computed properties (total_expenses / total_incomes are SQL aggregates, see below)
     @property
     def balance(self) -> float:
         return self.total_incomes - self.total_expenses
@@ -52,9 +45,20 @@ class Expense(Base):
     amount = Column(Float, nullable=False)
     date = Column(Date, nullable=False)
 
+    # Resolved from the category name on writes (user categories shadow globals)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="expenses")
 
+    # Backs keyset pagination and range / category filters of the list endpoint;
+    # /search uses the FULLTEXT index on MySQL and the expenses_fts table on SQLite
+    __table_args__ = (
+        Index("ix_expenses_user_date_id", "user_id", "date", "id"),
+        Index("ix_expenses_user_category_date", "user_id", "category_id", "date"),
+        Index("ix_expenses_description_ft", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
 # =========================
 # Income Table
 # =========================
@@ -69,6 +73,13 @@ class Income(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="incomes")
 
+    # Backs keyset pagination and range filters of the list endpoint;
+    # /search uses the FULLTEXT index on MySQL and the incomes_fts table on SQLite
+    __table_args__ = (
+        Index("ix_incomes_user_date_id", "user_id", "date", "id"),
+        Index("ix_incomes_description_ft", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
 # =========================
 # Category Table
 # =========================
@@ -84,3 +95,106 @@ class Category(Base):
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     user = relationship("User", back_populates="categories")
+
+    # Name lookups when resolving Expense.category_id
+    __table_args__ = (Index("ix_categories_user_name", "user_id", "name"),)
+
+# =========================
+# Recurring Rule Table
+# =========================
+# Template of a repeating expense/income, posted by the background scheduler
+# (see app/api/services/recurring.py) every time next_run is due
+class RecurringRule(Base):
+    __tablename__ = "recurring_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(10), nullable=False)  # "expense" | "income"
+    description = Column(String(255), nullable=False)
+    category = Column(String(100), nullable=True)  # expenses only
+    amount = Column(Float, nullable=False)
+    frequency = Column(String(10), nullable=False)  # "daily" | "weekly" | "monthly" | "yearly"
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)
+    runs = Column(Integer, nullable=False, default=0)  # occurrences posted so far
+    next_run = Column(Date, nullable=False)
+    active = Column(Boolean, nullable=False, default=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user = relationship("User", back_populates="recurring_rules")
+
+    # The scheduler's due-rules query
+    __table_args__ = (Index("ix_recurring_rules_active_next_run", "active", "next_run"),)
+
+# =========================
+# Monthly Rollup Table
+# =========================
+# Per (user, month, kind, category) totals, maintained incrementally by the
+# write paths (see app/api/services/rollups.py) so analytics never scan raw rows
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month
+    kind = Column(String(10), nullable=False)  # "expense" | "income"
+    category = Column(String(100), nullable=False, default="")  # "" for incomes
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("user_id", "month", "kind", "category", name="uq_monthly_rollups_key"),)
+
+# =========================
+# User Totals Table
+# =========================
+# Running all-time totals per user, maintained with the rollups in the same
+# transaction as every write (one primary key read for /users/me)
+class UserTotal(Base):
+    __tablename__ = "user_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_expenses = Column(Float, nullable=False, default=0.0)
+    total_incomes = Column(Float, nullable=False, default=0.0)
+
+# =========================
+# Idempotency Key Table
+# =========================
+# Stored response of a /batch call, replayed when a client retries the same batch with the same key
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=True)  # sha256 of the operations, NULL on rows older than 0009
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Keys expire after IDEMPOTENCY_KEY_TTL, created_at backs their cleanup
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+# =========================
+# SQL-side aggregates
+# =========================
+# Totals are read from the user_totals row with correlated subqueries instead
+# of loading every expense/income row. Both are deferred in the same group, so
+# the first access loads them together in a single query.
+User.total_expenses = column_property(
+    select(func.coalesce(func.max(UserTotal.total_expenses), 0.0))
+    .where(UserTotal.user_id == User.id)
+    .correlate_except(UserTotal)
+    .scalar_subquery(),
+    deferred=True,
+    group="totals",
+)
+
+User.total_incomes = column_property(
+    select(func.coalesce(func.max(UserTotal.total_incomes), 0.0))
+    .where(UserTotal.user_id == User.id)
+    .correlate_except(UserTotal)
+    .scalar_subquery(),
+    deferred=True,
+    group="totals",
+)
@@ -0,0 +1,40 @@
+import os
+import json
+import asyncio
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api.DTO.dtos import CurrentUserDTO
+from app.api.routes.endpoints import get_current_user
+from app.utils.alert_broker import ALERT_BROKER
+
+# Seconds between keep-alive comments on an idle stream
+ALERT_HEARTBEAT = float(os.getenv("ALERT_HEARTBEAT", 15))
+
+# =========================
+# Router
+# =========================
+alerts = APIRouter(prefix="/alerts")
+
+async def event_stream(user_id: int):
+    queue = ALERT_BROKER.subscribe(user_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                alert = await asyncio.wait_for(queue.get(), ALERT_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {alert['type']}\ndata: {json.dumps(alert)}\n\n"
+    finally:
+        ALERT_BROKER.unsubscribe(user_id, queue)
+
+@alerts.get("/stream")
+async def stream_alerts(current_user: CurrentUserDTO = Depends(get_current_user)):
+    """Server-Sent Events of budget thresholds (80% / 100%) and reached savings goals"""
+    return StreamingResponse(
+        event_stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
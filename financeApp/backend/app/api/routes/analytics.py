@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Request
+from datetime import date
+
+from app.dataBase.configuration import run_db
+from app.api.DTO.dtos import AnalyticsSummaryDTO, CurrentUserDTO
+from app.api.routes.endpoints import DBSession, get_db, get_current_user
+from app.api.services.rollups import summarize
+from app.utils.response_cache import cached_response
+
+# =========================
+# Router
+# =========================
+analytics = APIRouter(prefix="/analytics")
+
+@analytics.get("/summary", response_model=AnalyticsSummaryDTO)
+async def get_summary(
+    request: Request,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    async def build():
+        return AnalyticsSummaryDTO(**await run_db(db, summarize, current_user.id, date_from, date_to))
+    return await cached_response(request, current_user.id, build)
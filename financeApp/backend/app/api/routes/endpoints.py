@@ -1,21 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, UploadFile, File, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta, datetime, date
 from jose import JWTError, jwt
-from typing import List
 import os
 from dotenv import load_dotenv
 
-from app.dataBase.configuration import SessionLocal
-from app.api.models.tablesSQL import User, Expense, Income, Category
+from app.dataBase.configuration import SessionLocal, AsyncSessionLocal, asyncMode, run_db
+from app.api.models.tablesSQL import Expense, Income, Category, RecurringRule
 from app.api.DTO.dtos import (
     UserDTOPetition, UserDTOResponse, TokenDTO,
-    ExpenseDTOPetition, ExpenseDTOResponse,
-    IncomeDTOPetition, IncomeDTOResponse,
-    CategoryDTOPetition, CategoryDTOResponse
+    ExpenseDTOPetition, ExpenseDTOResponse, ExpensePageDTO,
+    IncomeDTOPetition, IncomeDTOResponse, IncomePageDTO,
+    CategoryDTOPetition, CategoryDTOResponse, CategoryPageDTO,
+    RecurringRuleDTOPetition, RecurringRuleDTOResponse, RecurringRulePageDTO,
+    BulkImportDTOResponse, BatchDTOPetition, BatchDTOResponse, CurrentUserDTO
 )
-from app.utils.security import hash_password, verify_password
+from app.api.services.ledger import create_item, list_items, update_item, delete_item
+from app.api.services.batch import BatchError, apply_batch
+from app.api.services.categories import global_categories
+from app.api.services.recurring import create_rule, list_rules, update_rule
+from app.api.services.users import (
+    USER_CACHE, USER_INCLUDES, create_user, find_user_by_name, load_identity, load_user_response, update_password_hash
+)
+from app.utils.security import PasswordHasherBusy, hash_password_async, verify_and_update_async
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, range_filters
+from app.utils.bulk_import import BULK_CHUNK_SIZE, BULK_FORMATS, detect_format, iter_records, import_records
+from app.utils.export import EXPORT_CHUNK_SIZE, EXPORT_MEDIA_TYPES, EXPORTERS
+from app.utils.response_cache import bump_user_version, cached_response
 
 # =========================
 # Environment
@@ -34,7 +49,22 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 # =========================
 # Database dependency
 # =========================
-def get_db():
+# Either session type is accepted by run_db()
+DBSession = Session | AsyncSession
+
+async def get_db():
+    if asyncMode:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+def get_sync_db():
+    """Plain sync Session for CPU heavy work that runs in the threadpool"""
     db = SessionLocal()
     try:
         yield db
@@ -50,7 +80,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid token",
@@ -58,153 +88,325 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise credentials_exception
-    user = db.query(User).filter(User.full_name == username).first()
+    # Fast path: cached identity, otherwise a primary key lookup
+    user = USER_CACHE.get(user_id)
     if user is None:
-        raise credentials_exception
+        user = await run_db(db, load_identity, user_id)
+        if user is None:
+            raise credentials_exception
+        USER_CACHE.set(user_id, user)
     return user
 
+def hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+def parse_include(include: str | None) -> set[str]:
+    """Parse the comma separated ?include= value of the user endpoints"""
+    if not include:
+        return set()
+    requested = {item.strip() for item in include.split(",") if item.strip()}
+    unknown = requested - USER_INCLUDES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    return requested
+
 # =========================
 # Auth Endpoints
 # =========================
 @routes.post("/signup", response_model=UserDTOResponse)
-def signup(user: UserDTOPetition, db: Session = Depends(get_db)):
-    db_user = User(
-        full_name=user.full_name,
-        birth_date=user.birth_date,
-        location=user.location,
-        savings_goal=user.savings_goal,
-        password=hash_password(user.password)
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+async def signup(user: UserDTOPetition, db: DBSession = Depends(get_db)):
+    data = user.model_dump(exclude={"password"})
+    try:
+        data["password"] = await hash_password_async(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception()
+    return await run_db(db, create_user, data)
 
 @routes.post("/login", response_model=TokenDTO)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.full_name == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: DBSession = Depends(get_db)):
+    user = await run_db(db, find_user_by_name, form_data.username)
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await verify_and_update_async(form_data.password, user.password)
+        except PasswordHasherBusy:
+            raise hasher_busy_exception()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # The stored hash was made with other bcrypt parameters, upgrade it
+    if new_hash:
+        await run_db(db, update_password_hash, user.id, new_hash)
     access_token = create_access_token(
-        data={"sub": user.full_name},
+        data={"sub": str(user.id), "name": user.full_name},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @routes.get("/users/me", response_model=UserDTOResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(
+    request: Request,
+    include: str | None = Query(None, description="Comma separated: expenses,incomes,categories"),
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    include = parse_include(include)
+    return await cached_response(request, current_user.id, lambda: run_db(db, load_user_response, current_user.id, include))
+
+# =========================
+# Bulk import
+# =========================
+def bulk_import(file: UploadFile, fmt: str | None, model, dto, user_id: int, chunk_size: int, db: Session):
+    """Stream an uploaded CSV/NDJSON file into model rows"""
+    fmt = fmt or detect_format(file.filename, file.content_type)
+    if fmt not in BULK_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of: {', '.join(BULK_FORMATS)}")
+    return import_records(db, model, dto, iter_records(file.file, fmt), user_id, chunk_size)
 
 # =========================
 # Expenses CRUD
 # =========================
 @routes.post("/expenses", response_model=ExpenseDTOResponse)
-def create_expense(expense: ExpenseDTOPetition, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_expense = Expense(**expense.dict(), user_id=current_user.id)
-    db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+async def create_expense(expense: ExpenseDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_expense = await run_db(db, create_item, Expense, ExpenseDTOResponse, expense.model_dump(), current_user.id)
+    await bump_user_version(current_user.id)
     return db_expense
 
-@routes.get("/expenses", response_model=List[ExpenseDTOResponse])
-def get_expenses(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(Expense).filter(Expense.user_id == current_user.id).all()
+@routes.post("/expenses/bulk", response_model=BulkImportDTOResponse)
+async def create_expenses_bulk(
+    file: UploadFile = File(...),
+    format: str | None = None,
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000),
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: Session = Depends(get_sync_db)
+):
+    try:
+        report = await run_in_threadpool(bulk_import, file, format, Expense, ExpenseDTOPetition, current_user.id, chunk_size, db)
+    finally:
+        # Earlier chunks may have committed even when a later one raised
+        await bump_user_version(current_user.id)
+    return report
+
+@routes.get("/expenses", response_model=ExpensePageDTO)
+async def get_expenses(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    category: str | None = None,
+    category_id: int | None = None,
+    min_amount: float | None = None,
+    max_amount: float | None = None,
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    criteria = [Expense.user_id == current_user.id]
+    criteria += range_filters(Expense.date, Expense.amount, date_from, date_to, min_amount, max_amount)
+    if category is not None:
+        criteria.append(Expense.category == category)
+    if category_id is not None:
+        criteria.append(Expense.category_id == category_id)
+    async def build():
+        return ExpensePageDTO(**await run_db(db, list_items, Expense, ExpenseDTOResponse, criteria, cursor, limit))
+    return await cached_response(request, current_user.id, build)
 
 @routes.put("/expenses/{expense_id}", response_model=ExpenseDTOResponse)
-def update_expense(expense_id: int, expense: ExpenseDTOPetition, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_expense = db.query(Expense).filter(Expense.id == expense_id, Expense.user_id == current_user.id).first()
+async def update_expense(expense_id: int, expense: ExpenseDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_expense = await run_db(db, update_item, Expense, ExpenseDTOResponse, expense_id, expense.model_dump(), current_user.id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
-    for key, value in expense.dict().items():
-        setattr(db_expense, key, value)
-    db.commit()
-    db.refresh(db_expense)
+    await bump_user_version(current_user.id)
     return db_expense
 
 @routes.delete("/expenses/{expense_id}")
-def delete_expense(expense_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_expense = db.query(Expense).filter(Expense.id == expense_id, Expense.user_id == current_user.id).first()
-    if not db_expense:
+async def delete_expense(expense_id: int, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    if not await run_db(db, delete_item, Expense, expense_id, current_user.id):
         raise HTTPException(status_code=404, detail="Expense not found")
-    db.delete(db_expense)
-    db.commit()
+    await bump_user_version(current_user.id)
     return {"detail": "Expense deleted"}
 
 # =========================
 # Incomes CRUD
 # =========================
 @routes.post("/incomes", response_model=IncomeDTOResponse)
-def create_income(income: IncomeDTOPetition, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_income = Income(**income.dict(), user_id=current_user.id)
-    db.add(db_income)
-    db.commit()
-    db.refresh(db_income)
+async def create_income(income: IncomeDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_income = await run_db(db, create_item, Income, IncomeDTOResponse, income.model_dump(), current_user.id)
+    await bump_user_version(current_user.id)
     return db_income
 
-@routes.get("/incomes", response_model=List[IncomeDTOResponse])
-def get_incomes(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(Income).filter(Income.user_id == current_user.id).all()
+@routes.post("/incomes/bulk", response_model=BulkImportDTOResponse)
+async def create_incomes_bulk(
+    file: UploadFile = File(...),
+    format: str | None = None,
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000),
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: Session = Depends(get_sync_db)
+):
+    try:
+        report = await run_in_threadpool(bulk_import, file, format, Income, IncomeDTOPetition, current_user.id, chunk_size, db)
+    finally:
+        # Earlier chunks may have committed even when a later one raised
+        await bump_user_version(current_user.id)
+    return report
+
+@routes.get("/incomes", response_model=IncomePageDTO)
+async def get_incomes(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    min_amount: float | None = None,
+    max_amount: float | None = None,
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    criteria = [Income.user_id == current_user.id]
+    criteria += range_filters(Income.date, Income.amount, date_from, date_to, min_amount, max_amount)
+    async def build():
+        return IncomePageDTO(**await run_db(db, list_items, Income, IncomeDTOResponse, criteria, cursor, limit))
+    return await cached_response(request, current_user.id, build)
 
 @routes.put("/incomes/{income_id}", response_model=IncomeDTOResponse)
-def update_income(income_id: int, income: IncomeDTOPetition, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_income = db.query(Income).filter(Income.id == income_id, Income.user_id == current_user.id).first()
+async def update_income(income_id: int, income: IncomeDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_income = await run_db(db, update_item, Income, IncomeDTOResponse, income_id, income.model_dump(), current_user.id)
     if not db_income:
         raise HTTPException(status_code=404, detail="Income not found")
-    for key, value in income.dict().items():
-        setattr(db_income, key, value)
-    db.commit()
-    db.refresh(db_income)
+    await bump_user_version(current_user.id)
     return db_income
 
 @routes.delete("/incomes/{income_id}")
-def delete_income(income_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_income = db.query(Income).filter(Income.id == income_id, Income.user_id == current_user.id).first()
-    if not db_income:
+async def delete_income(income_id: int, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    if not await run_db(db, delete_item, Income, income_id, current_user.id):
         raise HTTPException(status_code=404, detail="Income not found")
-    db.delete(db_income)
-    db.commit()
+    await bump_user_version(current_user.id)
     return {"detail": "Income deleted"}
 
 # =========================
 # Categories CRUD
 # =========================
 @routes.post("/categories", response_model=CategoryDTOResponse)
-def create_category(category: CategoryDTOPetition, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_category = Category(**category.dict(), user_id=current_user.id)
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+async def create_category(category: CategoryDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_category = await run_db(db, create_item, Category, CategoryDTOResponse, category.model_dump(), current_user.id)
+    await bump_user_version(current_user.id)
     return db_category
 
-@routes.get("/categories", response_model=List[CategoryDTOResponse])
-def get_categories(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(Category).filter(Category.user_id == current_user.id).all()
+@routes.get("/categories/global", response_model=list[CategoryDTOResponse])
+async def get_global_categories(db: DBSession = Depends(get_db)):
+    """Seeded categories shared by all users, served from the startup snapshot"""
+    snapshot = await run_db(db, global_categories)
+    return Response(content=snapshot.payload, media_type="application/json", headers={"Cache-Control": "public, max-age=3600"})
+
+@routes.get("/categories", response_model=CategoryPageDTO)
+async def get_categories(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    min_value: float | None = None,
+    max_value: float | None = None,
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    criteria = [Category.user_id == current_user.id]
+    criteria += range_filters(Category.date, Category.value, date_from, date_to, min_value, max_value)
+    async def build():
+        return CategoryPageDTO(**await run_db(db, list_items, Category, CategoryDTOResponse, criteria, cursor, limit))
+    return await cached_response(request, current_user.id, build)
 
 @routes.put("/categories/{category_id}", response_model=CategoryDTOResponse)
-def update_category(category_id: int, category: CategoryDTOPetition, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_category = db.query(Category).filter(Category.id == category_id, Category.user_id == current_user.id).first()
+async def update_category(category_id: int, category: CategoryDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_category = await run_db(db, update_item, Category, CategoryDTOResponse, category_id, category.model_dump(), current_user.id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
-    for key, value in category.dict().items():
-        setattr(db_category, key, value)
-    db.commit()
-    db.refresh(db_category)
+    await bump_user_version(current_user.id)
     return db_category
 
 @routes.delete("/categories/{category_id}")
-def delete_category(category_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_category = db.query(Category).filter(Category.id == category_id, Category.user_id == current_user.id).first()
-    if not db_category:
+async def delete_category(category_id: int, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    if not await run_db(db, delete_item, Category, category_id, current_user.id):
         raise HTTPException(status_code=404, detail="Category not found")
-    db.delete(db_category)
-    db.commit()
+    await bump_user_version(current_user.id)
     return {"detail": "Category deleted"}
+
+# =========================
+# Recurring rules CRUD
+# =========================
+@routes.post("/recurring", response_model=RecurringRuleDTOResponse)
+async def create_recurring_rule(rule: RecurringRuleDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_rule = await run_db(db, create_rule, rule.model_dump(), current_user.id)
+    await bump_user_version(current_user.id)
+    return db_rule
+
+@routes.get("/recurring", response_model=RecurringRulePageDTO)
+async def get_recurring_rules(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    async def build():
+        return RecurringRulePageDTO(**await run_db(db, list_rules, current_user.id, cursor, limit))
+    return await cached_response(request, current_user.id, build)
+
+@routes.put("/recurring/{rule_id}", response_model=RecurringRuleDTOResponse)
+async def update_recurring_rule(rule_id: int, rule: RecurringRuleDTOPetition, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    db_rule = await run_db(db, update_rule, rule_id, rule.model_dump(), current_user.id)
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Recurring rule not found")
+    await bump_user_version(current_user.id)
+    return db_rule
+
+@routes.delete("/recurring/{rule_id}")
+async def delete_recurring_rule(rule_id: int, current_user: CurrentUserDTO = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    if not await run_db(db, delete_item, RecurringRule, rule_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Recurring rule not found")
+    await bump_user_version(current_user.id)
+    return {"detail": "Recurring rule deleted"}
+
+# =========================
+# Batch writes
+# =========================
+@routes.post("/batch", response_model=BatchDTOResponse)
+async def batch_write(
+    batch: BatchDTOPetition,
+    idempotency_key: str | None = Header(None, max_length=255),
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    """Apply many creates / updates / deletes in one transaction, replayed for a repeated Idempotency-Key"""
+    try:
+        response, replayed = await run_db(db, apply_batch, current_user.id, batch.operations, idempotency_key)
+    except BatchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if not replayed:
+        await bump_user_version(current_user.id)
+    return response
+
+# =========================
+# Ledger export
+# =========================
+@routes.get("/export")
+def export_ledger(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    chunk_size: int = Query(EXPORT_CHUNK_SIZE, ge=1, le=10000),
+    current_user: CurrentUserDTO = Depends(get_current_user)
+):
+    return StreamingResponse(
+        EXPORTERS[format](current_user.id, chunk_size),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="ledger.{format}"'},
+    )
@@ -0,0 +1,50 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.dataBase.configuration import get_engine, get_async_engine
+from app.dataBase.pool_metrics import pool_stats, POOL_STATS
+from app.dataBase.sql_metrics import SQL_METRICS
+from app.utils.prometheus import metric_family, histogram_family
+
+# =========================
+# Router
+# =========================
+monitoring = APIRouter()
+
+def configured_engines() -> dict:
+    async_engine = get_async_engine()
+    return {"sync": get_engine(), "async": async_engine.sync_engine if async_engine else None}
+
+@monitoring.get("/pool/stats")
+def get_pool_stats():
+    return pool_stats(configured_engines())
+
+@monitoring.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of the sampled SQL metrics and the pool metrics"""
+    sql = SQL_METRICS
+    pools = pool_stats(configured_engines())
+    lines = []
+    lines += metric_family("finance_sql_sampled_requests_total", "counter", "Requests instrumented by the SQL middleware",
+                           [({"route": route}, count) for route, count in sql.requests.items()])
+    lines += metric_family("finance_sql_statements_total", "counter", "SQL statements executed by sampled requests",
+                           [({"route": route}, count) for route, count in sql.statements.items()])
+    lines += metric_family("finance_sql_seconds_total", "counter", "Time spent in SQL by sampled requests",
+                           [({"route": route}, round(seconds, 6)) for route, seconds in sql.db_seconds.items()])
+    lines += metric_family("finance_sql_n_plus_one_total", "counter", "Sampled requests that repeated an identical statement",
+                           [({"route": route}, count) for route, count in sql.n_plus_one.items()])
+    lines += histogram_family("finance_sql_request_db_seconds", "SQL time per sampled request",
+                              [({}, sql.db_time.snapshot())])
+    lines += histogram_family("finance_sql_request_statements", "SQL statements per sampled request",
+                              [({}, sql.statements_per_request.snapshot())])
+    for gauge in ("size", "checked_out", "overflow"):
+        lines += metric_family(f"finance_db_pool_{gauge}", "gauge", f"Connection pool {gauge.replace('_', ' ')}",
+                               [({"pool": key}, stats[gauge]) for key, stats in pools.items() if stats[gauge] is not None])
+    for counter in ("checkouts", "connects", "invalidations", "timeouts"):
+        lines += metric_family(f"finance_db_pool_{counter}_total", "counter", f"Connection pool {counter}",
+                               [({"pool": key}, stats[counter]) for key, stats in pools.items()])
+    lines += histogram_family("finance_db_pool_wait_seconds", "Time waiting for a pooled connection",
+                              [({"pool": key}, POOL_STATS[key].wait.snapshot()) for key in pools])
+    lines += histogram_family("finance_db_pool_checkout_seconds", "Total connection checkout latency",
+                              [({"pool": key}, POOL_STATS[key].checkout_latency.snapshot()) for key in pools])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query, Request
+from datetime import date
+
+from app.dataBase.configuration import run_db
+from app.api.DTO.dtos import SearchPageDTO, CurrentUserDTO
+from app.api.routes.endpoints import DBSession, get_db, get_current_user
+from app.api.services.search import search_ledger
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.response_cache import cached_response
+
+# =========================
+# Router
+# =========================
+search = APIRouter()
+
+@search.get("/search", response_model=SearchPageDTO)
+async def search_transactions(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str | None = Query(None, pattern="^(expense|income)$"),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    min_amount: float | None = None,
+    max_amount: float | None = None,
+    current_user: CurrentUserDTO = Depends(get_current_user),
+    db: DBSession = Depends(get_db)
+):
+    """Prefix search over expense and income descriptions, ranked by relevance"""
+    async def build():
+        return SearchPageDTO(**await run_db(
+            db, search_ledger, current_user.id, q, kind, date_from, date_to, min_amount, max_amount, cursor, limit
+        ))
+    return await cached_response(request, current_user.id, build)
@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+
+from app.api.models.tablesSQL import Expense, Income, Category, IdempotencyKey
+from app.api.DTO.dtos import (
+    ExpenseDTOPetition, ExpenseDTOResponse,
+    IncomeDTOPetition, IncomeDTOResponse,
+    CategoryDTOPetition, CategoryDTOResponse,
+    BatchOperationDTO, BatchResultDTO, BatchDTOResponse
+)
+from app.api.services.rollups import RollupDelta
+from app.api.services.categories import attach_category_ids, repoint_category_ids
+from app.api.services.ledger import begin_write
+
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", 1000))
+# Seconds a stored Idempotency-Key is replayed; older keys are deleted and can be reused
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+
+# Categories go first so expenses of the same batch resolve their category_id
+RESOURCES = {
+    "category": (Category, CategoryDTOPetition, CategoryDTOResponse),
+    "expense": (Expense, ExpenseDTOPetition, ExpenseDTOResponse),
+    "income": (Income, IncomeDTOPetition, IncomeDTOResponse),
+}
+
+class BatchError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+# =========================
+# Batch writes
+# =========================
+# All operations are applied in one transaction. Per resource, creates run
+# first, then updates (a later update of the same id wins), then deletes.
+
+def request_hash(operations: list[BatchOperationDTO]) -> str:
+    body = json.dumps([operation.model_dump(mode="json") for operation in operations], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+def expiry_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+
+def find_replay(db: Session, user_id: int, key: str, operations_hash: str) -> BatchDTOResponse | None:
+    """Stored response of a live key, 422 when the key was used for a different batch"""
+    stored = db.execute(
+        select(IdempotencyKey.response, IdempotencyKey.request_hash, IdempotencyKey.created_at)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    ).first()
+    if stored is None or stored.created_at < expiry_cutoff():
+        return None
+    if stored.request_hash is not None and stored.request_hash != operations_hash:
+        raise BatchError(422, "Idempotency-Key was already used with a different batch")
+    return BatchDTOResponse.model_validate_json(stored.response)
+
+def purge_idempotency_keys(db: Session, user_id: int | None = None) -> int:
+    """Delete expired keys (of one user, or all of them) without committing"""
+    statement = delete(IdempotencyKey).where(IdempotencyKey.created_at < expiry_cutoff())
+    if user_id is not None:
+        statement = statement.where(IdempotencyKey.user_id == user_id)
+    return db.execute(statement).rowcount
+
+def validate_operations(operations: list[BatchOperationDTO]) -> list:
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise BatchError(413, f"A batch accepts at most {BATCH_MAX_OPERATIONS} operations")
+    validated = []
+    for index, operation in enumerate(operations):
+        petition = RESOURCES[operation.resource][1]
+        if operation.op != "create" and operation.id is None:
+            raise BatchError(422, f"Operation {index}: id is required for {operation.op}")
+        data = None
+        if operation.op != "delete":
+            try:
+                data = petition.model_validate(operation.data or {}).model_dump()
+            except ValidationError as e:
+                raise BatchError(422, f"Operation {index}: {e.errors()[0]['loc']} {e.errors()[0]['msg']}")
+        validated.append((operation, data))
+    return validated
+
+def owned_rows(db: Session, model, ids: set, user_id: int) -> dict:
+    """Current rows of ids in one select, locked until commit (their values become the
+    negative rollup deltas); 404 when the user does not own all of them"""
+    if not ids:
+        return {}
+    begin_write(db, model)
+    rows = db.execute(
+        select(model.__table__).where(model.id.in_(ids), model.user_id == user_id).with_for_update()
+    ).mappings().all()
+    found = {row["id"]: dict(row) for row in rows}
+    missing = ids - found.keys()
+    if missing:
+        raise BatchError(404, f"{model.__name__} not found: {', '.join(map(str, sorted(missing)))}")
+    return found
+
+def insert_rows(db: Session, model, rows: list) -> list:
+    """Insert in order and return the new ids, with RETURNING when the dialect supports it"""
+    if not rows:
+        return []
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = db.execute(insert(model.__table__).returning(model.id, sort_by_parameter_order=True), rows)
+        return list(result.scalars())
+    items = [model(**row) for row in rows]
+    db.add_all(items)
+    db.flush()
+    return [item.id for item in items]
+
+def write_operations(db: Session, user_id: int, validated: list) -> dict:
+    """Apply the operations without committing, returns {operation index: new id} for creates"""
+    delta = RollupDelta()
+    created_ids = {}
+
+    for resource, (model, _, _) in RESOURCES.items():
+        ops = [(index, operation, data) for index, (operation, data) in enumerate(validated) if operation.resource == resource]
+        creates = [(index, data) for index, operation, data in ops if operation.op == "create"]
+        updates = {operation.id: data for _, operation, data in ops if operation.op == "update"}
+        deletes = {operation.id for _, operation, _ in ops if operation.op == "delete"}
+        current = owned_rows(db, model, updates.keys() | deletes, user_id)
+
+        new_rows = [{**data, "user_id": user_id} for _, data in creates]
+        attach_category_ids(db, model, new_rows, user_id)
+        for (index, _), new_id in zip(creates, insert_rows(db, model, new_rows)):
+            created_ids[index] = new_id
+        for row in new_rows:
+            delta.add_item(model, row)
+
+        updates = {item_id: data for item_id, data in updates.items() if item_id not in deletes}
+        if updates:
+            attach_category_ids(db, model, list(updates.values()), user_id)
+            db.execute(update(model), [{"id": item_id, **data} for item_id, data in updates.items()])
+            for item_id, data in updates.items():
+                delta.add_item(model, current[item_id], -1)
+                delta.add_item(model, {**data, "user_id": user_id})
+        if deletes:
+            db.execute(delete(model).where(model.id.in_(deletes), model.user_id == user_id))
+            for item_id in deletes:
+                delta.add_item(model, current[item_id], -1)
+        if model is Category:
+            # Existing expenses follow created, renamed and deleted categories
+            names = {data["name"] for _, data in creates} | {data["name"] for data in updates.values()}
+            repoint_category_ids(db, user_id, names | {current[item_id]["name"] for item_id in current})
+
+    delta.apply(db)
+    return created_ids
+
+def apply_batch(db: Session, user_id: int, operations: list[BatchOperationDTO], idempotency_key: str | None = None) -> tuple[BatchDTOResponse, bool]:
+    """Returns (response, replayed)"""
+    operations_hash = request_hash(operations) if idempotency_key else None
+    if idempotency_key:
+        replay = find_replay(db, user_id, idempotency_key, operations_hash)
+        if replay:
+            return replay, True
+    validated = validate_operations(operations)
+    try:
+        created_ids = write_operations(db, user_id, validated)
+    except BatchError:
+        db.rollback()
+        raise
+    response = BatchDTOResponse(results=build_results(db, validated, created_ids))
+    if idempotency_key:
+        # Also frees this key when an expired row still holds it
+        purge_idempotency_keys(db, user_id)
+        db.add(IdempotencyKey(user_id=user_id, key=idempotency_key, request_hash=operations_hash, response=response.model_dump_json()))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key committed first
+        db.rollback()
+        replay = find_replay(db, user_id, idempotency_key, operations_hash) if idempotency_key else None
+        if replay is None:
+            raise
+        return replay, True
+    return response, False
+
+def build_results(db: Session, validated: list, created_ids: dict) -> list[BatchResultDTO]:
+    """Resulting rows of every resource through a single follow-up select each"""
+    touched = {}
+    for index, (operation, _) in enumerate(validated):
+        if operation.op != "delete":
+            touched.setdefault(operation.resource, set()).add(created_ids.get(index, operation.id))
+    items = {}
+    for resource, ids in touched.items():
+        model, _, response_dto = RESOURCES[resource]
+        columns = [getattr(model, field) for field in response_dto.model_fields]
+        for row in db.execute(select(*columns).where(model.id.in_(ids))):
+            items[(resource, row.id)] = response_dto.model_validate(row).model_dump(mode="json")
+    deleted = {(operation.resource, operation.id) for operation, _ in validated if operation.op == "delete"}
+    results = []
+    for index, (operation, _) in enumerate(validated):
+        item_id = created_ids.get(index, operation.id)
+        item = None if (operation.resource, item_id) in deleted else items.get((operation.resource, item_id))
+        results.append(BatchResultDTO(op=operation.op, resource=operation.resource, id=item_id, item=item))
+    return results
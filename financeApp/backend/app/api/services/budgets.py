@@ -0,0 +1,82 @@
+import os
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+
+from app.api.models.tablesSQL import User, UserTotal, Category, MonthlyRollup
+from app.utils.alert_broker import ALERT_BROKER
+
+# Fractions of a category's monthly budget (Category.value) that raise an alert
+BUDGET_THRESHOLDS = tuple(float(t) for t in os.getenv("BUDGET_THRESHOLDS", "0.8,1.0").split(","))
+
+# =========================
+# Budget and savings goal alerts
+# =========================
+# Evaluated from the rollup / user total deltas of a write, right after they
+# are applied: an alert fires when the counter moves across a threshold, so
+# nothing is recomputed on reads. Alerts wait in session.info until commit.
+
+def crossed(before: float, after: float, limit: float) -> bool:
+    return before < limit <= after
+
+def budget_alerts(db: Session, rows: list[dict]) -> list[dict]:
+    """Category budgets crossed by the expense rows of a rollup delta"""
+    spent = {(row["user_id"], row["month"], row["category"]): row["total"] for row in rows if row["kind"] == "expense" and row["total"] > 0}
+    if not spent:
+        return []
+    counters = db.execute(
+        select(MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.category, MonthlyRollup.total, Category.value)
+        .join(Category, (Category.user_id == MonthlyRollup.user_id) & (Category.name == MonthlyRollup.category))
+        .where(
+            MonthlyRollup.kind == "expense",
+            MonthlyRollup.user_id.in_({key[0] for key in spent}),
+            MonthlyRollup.month.in_({key[1] for key in spent}),
+            MonthlyRollup.category.in_({key[2] for key in spent}),
+            Category.value > 0,
+        )
+    )
+    alerts = []
+    for user_id, month, category, total, budget in counters:
+        delta = spent.get((user_id, month, category))
+        if delta is None:
+            continue
+        for threshold in BUDGET_THRESHOLDS:
+            if crossed(total - delta, total, budget * threshold):
+                alerts.append({
+                    "type": "budget", "user_id": user_id, "category": category, "month": month.isoformat(),
+                    "threshold": round(threshold * 100), "spent": total, "budget": budget,
+                })
+    return alerts
+
+def savings_alerts(db: Session, totals: dict) -> list[dict]:
+    """Savings goals reached by the user total deltas (balance going up)"""
+    gained = {user_id: values["total_incomes"] - values["total_expenses"] for user_id, values in totals.items()}
+    gained = {user_id: delta for user_id, delta in gained.items() if delta > 0}
+    if not gained:
+        return []
+    balances = db.execute(
+        select(UserTotal.user_id, UserTotal.total_incomes - UserTotal.total_expenses, User.savings_goal)
+        .join(User, User.id == UserTotal.user_id)
+        .where(UserTotal.user_id.in_(gained), User.savings_goal > 0)
+    )
+    return [
+        {"type": "savings_goal", "user_id": user_id, "balance": balance, "savings_goal": goal}
+        for user_id, balance, goal in balances
+        if crossed(balance - gained[user_id], balance, goal)
+    ]
+
+def queue_alerts(db: Session, rows: list[dict], totals: dict):
+    alerts = budget_alerts(db, rows) + savings_alerts(db, totals)
+    if alerts:
+        db.info.setdefault("pending_alerts", []).extend(alerts)
+
+# =========================
+# Publish after commit
+# =========================
+@event.listens_for(Session, "after_commit")
+def publish_alerts(session: Session):
+    for alert in session.info.pop("pending_alerts", ()):
+        ALERT_BROKER.publish(alert["user_id"], alert)
+
+@event.listens_for(Session, "after_soft_rollback")
+def drop_alerts(session: Session, previous_transaction):
+    session.info.pop("pending_alerts", None)
@@ -0,0 +1,101 @@
+from types import MappingProxyType
+from sqlalchemy import select, update, or_
+from sqlalchemy.orm import Session
+
+from app.api.models.tablesSQL import Expense, Category
+from app.api.DTO.dtos import CategoryDTOResponse
+
+# =========================
+# Global categories cache
+# =========================
+# The seeded global categories never change at runtime, so they are read once
+# and shared by every request as an immutable snapshot.
+
+class GlobalCategories:
+    """Read-only snapshot: ordered items, name -> id lookup and the serialized list"""
+
+    def __init__(self, items: tuple[CategoryDTOResponse, ...] = ()):
+        self.items = items
+        self.ids_by_name = MappingProxyType({item.name: item.id for item in items})
+        self.payload = ("[" + ",".join(item.model_dump_json() for item in items) + "]").encode()
+
+_global_categories: GlobalCategories | None = None
+
+def load_global_categories(db: Session) -> GlobalCategories:
+    """(Re)load the snapshot, called at startup after seeding"""
+    global _global_categories
+    columns = [getattr(Category, field) for field in CategoryDTOResponse.model_fields]
+    rows = db.execute(select(*columns).where(Category.user_id.is_(None)).order_by(Category.id))
+    _global_categories = GlobalCategories(tuple(CategoryDTOResponse.model_validate(row) for row in rows))
+    return _global_categories
+
+def global_categories(db: Session) -> GlobalCategories:
+    """The shared snapshot, loaded on first use when startup did not load it"""
+    return _global_categories or load_global_categories(db)
+
+# =========================
+# Category resolution
+# =========================
+def resolve_category_ids(db: Session, user_id: int, names: set[str]) -> dict[str, int]:
+    """Map names to category ids with one indexed (user_id, name) query; user categories shadow globals"""
+    if not names:
+        return {}
+    ids_by_name = global_categories(db).ids_by_name
+    resolved = {name: ids_by_name[name] for name in names if name in ids_by_name}
+    rows = db.execute(
+        select(Category.name, Category.id).where(Category.user_id == user_id, Category.name.in_(names)).order_by(Category.id)
+    )
+    user_ids = {}
+    for row in rows:
+        user_ids.setdefault(row.name, row.id)
+    resolved.update(user_ids)
+    return resolved
+
+def matching_category_id():
+    """Correlated subquery of the category an expense row resolves to, the same rule as
+    resolve_category_ids: the user's category with the lowest id, else the global one"""
+    return (
+        select(Category.id)
+        .where(Category.name == Expense.category, or_(Category.user_id == Expense.user_id, Category.user_id.is_(None)))
+        .order_by(Category.user_id.is_(None), Category.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+def repoint_category_ids(db: Session, user_id: int, names: set[str]) -> None:
+    """Re-resolve category_id of the user's expenses named like a category that was created,
+    renamed or deleted (old and new names), in the caller's transaction"""
+    if not names:
+        return
+    db.flush()
+    db.execute(
+        update(Expense)
+        .where(Expense.user_id == user_id, Expense.category.in_(names))
+        .values(category_id=matching_category_id())
+        .execution_options(synchronize_session=False)
+    )
+
+def attach_category_ids(db: Session, model, rows: list[dict], user_id: int) -> None:
+    """Set category_id on expense rows in place; no-op for other models"""
+    if model is not Expense or not rows:
+        return
+    resolved = resolve_category_ids(db, user_id, {row["category"] for row in rows})
+    for row in rows:
+        row["category_id"] = resolved.get(row["category"])
+
+def attach_category_ids_by_user(db: Session, model, rows: list[dict]) -> None:
+    """attach_category_ids for rows of many users (each row carries user_id), still one query"""
+    if model is not Expense or not rows:
+        return
+    ids_by_name = global_categories(db).ids_by_name
+    matches = db.execute(
+        select(Category.user_id, Category.name, Category.id).where(
+            Category.user_id.in_({row["user_id"] for row in rows}),
+            Category.name.in_({row["category"] for row in rows}),
+        ).order_by(Category.id)
+    )
+    resolved = {}
+    for match in matches:
+        resolved.setdefault((match.user_id, match.name), match.id)
+    for row in rows:
+        row["category_id"] = resolved.get((row["user_id"], row["category"]), ids_by_name.get(row["category"]))
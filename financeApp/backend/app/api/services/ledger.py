@@ -0,0 +1,89 @@
+from sqlalchemy import select, update, delete, false
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+
+from app.utils.pagination import paginate
+from app.api.services.rollups import RollupDelta
+from app.api.models.tablesSQL import Category
+from app.api.services.categories import attach_category_ids, repoint_category_ids
+
+# =========================
+# Generic CRUD for expenses, incomes and categories
+# =========================
+# These run on a sync Session (in the threadpool or through AsyncSession.run_sync)
+# and return DTOs, so nothing lazy-loads after the session is gone.
+
+def begin_write(db: Session, model) -> None:
+    """SQLite ignores FOR UPDATE: a no-op DELETE starts the write transaction there,
+    which keeps other writers out until commit, before rows that will be rewritten are read"""
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(delete(model.__table__).where(false()))
+
+def get_owned(db: Session, model, item_id: int, user_id: int, lock: bool = False):
+    """The user's row or None; lock=True keeps it locked until commit for read-modify-write paths"""
+    query = db.query(model).filter(model.id == item_id, model.user_id == user_id)
+    if lock:
+        begin_write(db, model)
+        query = query.with_for_update()
+    return query.first()
+
+def create_item(db: Session, model, response_dto: type[BaseModel], data: dict, user_id: int):
+    attach_category_ids(db, model, [data], user_id)
+    db_item = model(**data, user_id=user_id)
+    db.add(db_item)
+    if model is Category:
+        repoint_category_ids(db, user_id, {data["name"]})
+    delta = RollupDelta()
+    delta.add_item(model, db_item)
+    delta.apply(db)
+    db.commit()
+    db.refresh(db_item)
+    return response_dto.model_validate(db_item)
+
+def list_items(db: Session, model, response_dto: type[BaseModel], criteria: list, cursor: str | None, limit: int) -> dict:
+    """Select only the DTO columns and build the DTOs from the rows, no ORM entities"""
+    columns = [getattr(model, field) for field in response_dto.model_fields]
+    rows, next_cursor = paginate(db, select(*columns).where(*criteria), model, cursor, limit)
+    return {"items": [response_dto.model_validate(row) for row in rows], "next_cursor": next_cursor}
+
+def update_item(db: Session, model, response_dto: type[BaseModel], item_id: int, data: dict, user_id: int):
+    """Return the updated item, None when the user does not own it"""
+    db_item = get_owned(db, model, item_id, user_id, lock=True)
+    if not db_item:
+        return None
+    attach_category_ids(db, model, [data], user_id)
+    delta = RollupDelta()
+    delta.add_item(model, db_item, -1)
+    result = db.execute(
+        update(model).where(model.id == item_id, model.user_id == user_id).values(**data),
+        execution_options={"synchronize_session": False},
+    )
+    # The old values only leave the rollups when this statement changed the row
+    if result.rowcount != 1:
+        db.rollback()
+        return None
+    if model is Category:
+        repoint_category_ids(db, user_id, {db_item.name, data["name"]})
+    delta.add_item(model, {**data, "user_id": user_id})
+    delta.apply(db)
+    db.commit()
+    db.refresh(db_item)
+    return response_dto.model_validate(db_item)
+
+def delete_item(db: Session, model, item_id: int, user_id: int) -> bool:
+    """Return False when the user does not own the item"""
+    db_item = get_owned(db, model, item_id, user_id, lock=True)
+    if not db_item:
+        return False
+    delta = RollupDelta()
+    delta.add_item(model, db_item, -1)
+    result = db.execute(delete(model).where(model.id == item_id, model.user_id == user_id))
+    # A retried DELETE that lost the race must not subtract the row a second time
+    if result.rowcount != 1:
+        db.rollback()
+        return False
+    if model is Category:
+        repoint_category_ids(db, user_id, {db_item.name})
+    delta.apply(db)
+    db.commit()
+    return True
@@ -0,0 +1,156 @@
+import os
+import asyncio
+import logging
+from calendar import monthrange
+from datetime import date, timedelta
+from sqlalchemy import select, insert, update, true
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.dataBase.configuration import SessionLocal
+from app.api.models.tablesSQL import Expense, Income, RecurringRule
+from app.api.DTO.dtos import RecurringRuleDTOResponse
+from app.api.services.ledger import get_owned
+from app.api.services.rollups import RollupDelta
+from app.api.services.categories import attach_category_ids_by_user
+from app.utils.pagination import paginate
+from app.utils.response_cache import bump_user_version
+
+# Seconds between scheduler ticks, 0 disables the scheduler in this process
+RECURRING_INTERVAL = float(os.getenv("RECURRING_INTERVAL", 60))
+# Rules locked and materialized per transaction
+RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", 1000))
+# Missed occurrences posted per rule and transaction when catching up
+RECURRING_MAX_CATCHUP = int(os.getenv("RECURRING_MAX_CATCHUP", 366))
+
+logger = logging.getLogger("finance.recurring")
+
+RULE_MODELS = {"expense": Expense, "income": Income}
+
+# =========================
+# Schedule
+# =========================
+def occurrence(start: date, frequency: str, n: int) -> date:
+    """Date of the n-th occurrence (0 = start); months are counted from start so days never drift"""
+    if frequency == "daily":
+        return start + timedelta(days=n)
+    if frequency == "weekly":
+        return start + timedelta(weeks=n)
+    months = start.month - 1 + n * (12 if frequency == "yearly" else 1)
+    year, month = start.year + months // 12, months % 12 + 1
+    return date(year, month, min(start.day, monthrange(year, month)[1]))
+
+def first_run_from(start: date, frequency: str, not_before: date) -> tuple[int, date]:
+    """(runs, next_run) of the first occurrence on or after not_before"""
+    runs = 0
+    if frequency == "daily":
+        runs = max((not_before - start).days, 0)
+    elif frequency == "weekly":
+        runs = max(-(-(not_before - start).days // 7), 0)
+    day = occurrence(start, frequency, runs)
+    while day < not_before:
+        runs += 1
+        day = occurrence(start, frequency, runs)
+    return runs, day
+
+# =========================
+# Rules CRUD
+# =========================
+def create_rule(db: Session, data: dict, user_id: int) -> RecurringRuleDTOResponse:
+    db_rule = RecurringRule(**data, user_id=user_id, runs=0, next_run=data["start_date"])
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    return RecurringRuleDTOResponse.model_validate(db_rule)
+
+def list_rules(db: Session, user_id: int, cursor: str | None, limit: int) -> dict:
+    columns = [getattr(RecurringRule, field) for field in RecurringRuleDTOResponse.model_fields]
+    statement = select(*columns).where(RecurringRule.user_id == user_id)
+    rows, next_cursor = paginate(db, statement, RecurringRule, cursor, limit, date_column=RecurringRule.next_run)
+    return {"items": [RecurringRuleDTOResponse.model_validate(row) for row in rows], "next_cursor": next_cursor}
+
+def update_rule(db: Session, rule_id: int, data: dict, user_id: int):
+    """Return the updated rule, None when the user does not own it.
+    Occurrences already posted are kept: the new schedule resumes at the old next_run.
+    The rule stays locked until commit, so a scheduler tick cannot post from the next_run read here."""
+    db_rule = get_owned(db, RecurringRule, rule_id, user_id, lock=True)
+    if not db_rule:
+        return None
+    runs, next_run = first_run_from(data["start_date"], data["frequency"], max(db_rule.next_run, data["start_date"]))
+    for key, value in data.items():
+        setattr(db_rule, key, value)
+    db_rule.runs, db_rule.next_run = runs, next_run
+    db.commit()
+    db.refresh(db_rule)
+    return RecurringRuleDTOResponse.model_validate(db_rule)
+
+# =========================
+# Materialization
+# =========================
+def materialize_due(db: Session, today: date, batch_size: int = RECURRING_BATCH_SIZE) -> tuple[int, set]:
+    """Post every due occurrence of up to batch_size rules in one transaction.
+    Rules are locked with FOR UPDATE SKIP LOCKED, so concurrent workers take disjoint
+    batches and an occurrence is never posted twice. Returns (rules, affected user ids)."""
+    due = db.execute(
+        select(RecurringRule.__table__)
+        .where(RecurringRule.active == true(), RecurringRule.next_run <= today)
+        .order_by(RecurringRule.next_run)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).mappings().all()
+    if not due:
+        db.rollback()
+        return 0, set()
+
+    posted = {Expense: [], Income: []}
+    advanced = []
+    for rule in due:
+        runs, day, end = rule["runs"], rule["next_run"], rule["end_date"]
+        for _ in range(RECURRING_MAX_CATCHUP):
+            if day > today or (end is not None and day > end):
+                break
+            row = {"description": rule["description"], "amount": rule["amount"], "date": day, "user_id": rule["user_id"]}
+            if rule["kind"] == "expense":
+                row["category"] = rule["category"]
+            posted[RULE_MODELS[rule["kind"]]].append(row)
+            runs += 1
+            day = occurrence(rule["start_date"], rule["frequency"], runs)
+        advanced.append({"id": rule["id"], "runs": runs, "next_run": day, "active": end is None or day <= end})
+
+    delta = RollupDelta()
+    for model, rows in posted.items():
+        if rows:
+            attach_category_ids_by_user(db, model, rows)
+            db.execute(insert(model), rows)
+            for row in rows:
+                delta.add_item(model, row)
+    db.execute(update(RecurringRule), advanced)
+    delta.apply(db)
+    db.commit()
+    return len(due), {rule["user_id"] for rule in due}
+
+def materialize_tick(today: date | None = None) -> tuple[int, set]:
+    with SessionLocal() as db:
+        return materialize_due(db, today or date.today())
+
+# =========================
+# Background scheduler
+# =========================
+async def run_scheduler(stop: asyncio.Event, interval: float = RECURRING_INTERVAL):
+    """Every interval seconds, drain due rules batch by batch until a batch comes back short"""
+    while not stop.is_set():
+        try:
+            while not stop.is_set():
+                rules, user_ids = await run_in_threadpool(materialize_tick)
+                for user_id in user_ids:
+                    await bump_user_version(user_id)
+                if rules:
+                    logger.info("Materialized %d recurring rules", rules)
+                if rules < RECURRING_BATCH_SIZE:
+                    break
+        except Exception:
+            logger.exception("Recurring scheduler tick failed")
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
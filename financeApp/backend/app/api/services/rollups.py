@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+
+from app.api.models.tablesSQL import User, UserTotal, Expense, Income, MonthlyRollup
+from app.api.services.budgets import queue_alerts
+
+# =========================
+# Incremental monthly rollups
+# =========================
+# Every write to expenses/incomes adds signed deltas here and applies them in
+# the same transaction as the write, so the rollup and user_totals tables are
+# always in sync. They double as the spend counters of the budget alerts.
+
+ROLLUP_KINDS = {Expense: "expense", Income: "income"}
+
+def month_of(day: date) -> date:
+    return day.replace(day=1)
+
+class RollupDelta:
+    """Accumulates (total, count) deltas per rollup key until apply()"""
+
+    def __init__(self):
+        self.entries = defaultdict(lambda: [0.0, 0])
+
+    def add(self, kind: str, user_id: int, day: date, category: str | None, amount: float, count: int = 1):
+        entry = self.entries[(user_id, month_of(day), kind, category or "")]
+        entry[0] += amount
+        entry[1] += count
+
+    def add_item(self, model, item, sign: int = 1):
+        """Track an ORM row (or a dict of its values) with sign +1 / -1; ignored for non ledger models"""
+        kind = ROLLUP_KINDS.get(model)
+        if kind is None:
+            return
+        get = item.get if isinstance(item, dict) else lambda key: getattr(item, key, None)
+        self.add(kind, get("user_id"), get("date"), get("category"), sign * get("amount"), sign)
+
+    def apply(self, db: Session, alerts: bool = True):
+        """Upsert the rollup and user total deltas in one executemany statement each (no commit).
+        With alerts, threshold crossings are queued on the session and published after commit."""
+        rows = [
+            {"user_id": user_id, "month": month, "kind": kind, "category": category, "total": total, "count": count}
+            for (user_id, month, kind, category), (total, count) in self.entries.items()
+            if total or count
+        ]
+        self.entries.clear()
+        if not rows:
+            return
+        db.execute(upsert_statement(db, MonthlyRollup.__table__, ["user_id", "month", "kind", "category"], ["total", "count"]), rows)
+        totals = defaultdict(lambda: {"total_expenses": 0.0, "total_incomes": 0.0})
+        for row in rows:
+            totals[row["user_id"]]["total_expenses" if row["kind"] == "expense" else "total_incomes"] += row["total"]
+        db.execute(
+            upsert_statement(db, UserTotal.__table__, ["user_id"], ["total_expenses", "total_incomes"]),
+            [{"user_id": user_id, **values} for user_id, values in totals.items()],
+        )
+        if alerts:
+            queue_alerts(db, rows, totals)
+
+def upsert_statement(db: Session, table, keys: list[str], counters: list[str]):
+    """INSERT ... that adds the counters to an existing row with the same keys instead of failing"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(**{name: table.c[name] + stmt.inserted[name] for name in counters})
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+    )
+
+def rebuild_rollups(db: Session, user_id: int | None = None):
+    """Recompute rollups and user totals from the raw rows, for backfills only (never on reads)"""
+    for table in (MonthlyRollup, UserTotal):
+        clear = delete(table)
+        if user_id is not None:
+            clear = clear.where(table.user_id == user_id)
+        db.execute(clear)
+    delta = RollupDelta()
+    for model, kind in ROLLUP_KINDS.items():
+        category = model.category if model is Expense else None
+        columns = [model.user_id, model.date] + ([category] if category is not None else [])
+        query = select(*columns, func.sum(model.amount), func.count()).group_by(*columns)
+        if user_id is not None:
+            query = query.where(model.user_id == user_id)
+        for row in db.execute(query.execution_options(yield_per=1000)):
+            row_category = row[2] if category is not None else None
+            delta.add(kind, row[0], row[1], row_category, row[-2], row[-1])
+    delta.apply(db, alerts=False)
+    db.commit()
+
+# =========================
+# Analytics summary
+# =========================
+def progress(balance: float, savings_goal: float) -> float:
+    return round((balance / savings_goal) * 100, 2) if savings_goal > 0 else 0.0
+
+def summarize(db: Session, user_id: int, month_from: date | None = None, month_to: date | None = None) -> dict:
+    """Per month / per category totals read from the rollups only"""
+    savings_goal = db.scalar(select(User.savings_goal).where(User.id == user_id)) or 0.0
+    rollup = MonthlyRollup
+    criteria = [rollup.user_id == user_id, rollup.count > 0]
+    # Running balance starts from everything before the requested range
+    opening_balance = 0.0
+    if month_from is not None:
+        month_from = month_of(month_from)
+        opening = db.execute(
+            select(rollup.kind, func.sum(rollup.total))
+            .where(*criteria, rollup.month < month_from)
+            .group_by(rollup.kind)
+        ).all()
+        totals = dict(opening)
+        opening_balance = totals.get("income", 0.0) - totals.get("expense", 0.0)
+        criteria.append(rollup.month >= month_from)
+    if month_to is not None:
+        criteria.append(rollup.month <= month_of(month_to))
+
+    rows = db.execute(
+        select(rollup.month, rollup.kind, rollup.category, rollup.total)
+        .where(*criteria)
+        .order_by(rollup.month)
+    ).all()
+
+    months, by_category = {}, defaultdict(float)
+    for month, kind, category, total in rows:
+        entry = months.setdefault(month, {"month": month, "total_expenses": 0.0, "total_incomes": 0.0, "expenses_by_category": defaultdict(float)})
+        if kind == "expense":
+            entry["total_expenses"] += total
+            entry["expenses_by_category"][category] += total
+            by_category[category] += total
+        else:
+            entry["total_incomes"] += total
+
+    running = opening_balance
+    for entry in months.values():
+        entry["balance"] = entry["total_incomes"] - entry["total_expenses"]
+        running += entry["balance"]
+        entry["running_balance"] = running
+        entry["savings_progress"] = progress(running, savings_goal)
+        entry["expenses_by_category"] = dict(entry["expenses_by_category"])
+
+    total_expenses = sum(entry["total_expenses"] for entry in months.values())
+    total_incomes = sum(entry["total_incomes"] for entry in months.values())
+    return {
+        "savings_goal": savings_goal,
+        "total_expenses": total_expenses,
+        "total_incomes": total_incomes,
+        "balance": total_incomes - total_expenses,
+        "expenses_by_category": dict(by_category),
+        "months": list(months.values()),
+    }
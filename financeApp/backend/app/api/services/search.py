@@ -0,0 +1,69 @@
+import os
+import re
+from sqlalchemy import select, literal, literal_column, null, func, table, column, union_all, and_, String
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from app.api.models.tablesSQL import Expense, Income
+from app.api.DTO.dtos import SearchResultDTO
+from app.utils.pagination import range_filters, encode_offset_cursor, decode_offset_cursor
+
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", 8))
+
+SEARCH_MODELS = {"expense": Expense, "income": Income}
+
+# =========================
+# Full-text search over descriptions
+# =========================
+# MySQL matches the FULLTEXT indexes in BOOLEAN MODE, SQLite the FTS5 tables of
+# migration 0008 (ranked by bm25). Every term must match, as a word prefix.
+# Other dialects fall back to a LIKE scan without ranking.
+
+def search_terms(q: str) -> list[str]:
+    return re.findall(r"\w+", q.lower())[:SEARCH_MAX_TERMS]
+
+def match_statement(db: Session, model, terms: list[str]):
+    """(select of model rows matching every term, relevance score expression)"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        relevance = mysql.match(model.description, against=" ".join(f"+{term}*" for term in terms)).in_boolean_mode()
+        return select(model).where(relevance), relevance
+    if dialect == "sqlite":
+        fts = table(f"{model.__tablename__}_fts", column("rowid"), column("rank"))
+        query = " ".join(f'"{term}"*' for term in terms)
+        statement = select(model).join(fts, fts.c.rowid == model.id).where(literal_column(fts.name).op("MATCH")(query))
+        return statement, -fts.c.rank  # bm25 rank, lower is better
+    matches = [func.lower(model.description).like(f"%{term}%") for term in terms]
+    return select(model).where(and_(*matches)), literal(0.0)
+
+def search_ledger(
+    db: Session, user_id: int, q: str, kind: str | None, date_from=None, date_to=None,
+    min_amount=None, max_amount=None, cursor: str | None = None, limit: int = 50
+) -> dict:
+    """Ranked expenses and incomes whose description matches q, best first"""
+    terms = search_terms(q)
+    if not terms:
+        return {"items": [], "next_cursor": None}
+    selects = []
+    for name, model in SEARCH_MODELS.items():
+        if kind is not None and kind != name:
+            continue
+        statement, score = match_statement(db, model, terms)
+        category = model.category if model is Expense else null().cast(String(100))
+        selects.append(
+            statement.with_only_columns(
+                literal(name).label("kind"), model.id, model.description, category.label("category"),
+                model.amount, model.date, score.label("score"),
+                maintain_column_froms=True,
+            ).where(model.user_id == user_id, *range_filters(model.date, model.amount, date_from, date_to, min_amount, max_amount))
+        )
+    results = union_all(*selects).subquery("results")
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    rows = db.execute(
+        select(results)
+        .order_by(results.c.score.desc(), results.c.date.desc(), results.c.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    ).all()
+    next_cursor = encode_offset_cursor(offset + limit) if len(rows) > limit else None
+    return {"items": [SearchResultDTO.model_validate(row) for row in rows[:limit]], "next_cursor": next_cursor}
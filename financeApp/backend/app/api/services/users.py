@@ -0,0 +1,71 @@
+import os
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session, selectinload, undefer_group
+
+from app.api.models.tablesSQL import User
+from app.api.DTO.dtos import UserDTOResponse, ExpenseDTOResponse, IncomeDTOResponse, CategoryDTOResponse, CurrentUserDTO
+from app.utils.cache import TTLCache
+
+USER_INCLUDES = {"expenses", "incomes", "categories"}
+
+# Short-lived cache of token identities, so authenticated calls skip the users table
+USER_CACHE = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("USER_CACHE_TTL", 60)),
+)
+
+def build_user_response(user: User, include: set[str]) -> UserDTOResponse:
+    """Serialize a user with SQL-side totals; relationship lists are only loaded when requested"""
+    response = UserDTOResponse(
+        id=user.id,
+        full_name=user.full_name,
+        birth_date=user.birth_date,
+        location=user.location,
+        savings_goal=user.savings_goal,
+        total_expenses=user.total_expenses,
+        total_incomes=user.total_incomes,
+        balance=user.balance,
+        savings_progress=user.savings_progress,
+    )
+    if "expenses" in include:
+        response.expenses = [ExpenseDTOResponse.model_validate(exp) for exp in user.expenses]
+    if "incomes" in include:
+        response.incomes = [IncomeDTOResponse.model_validate(inc) for inc in user.incomes]
+    if "categories" in include:
+        response.categories = [CategoryDTOResponse.model_validate(cat) for cat in user.categories]
+    return response
+
+def create_user(db: Session, data: dict) -> UserDTOResponse:
+    db_user = User(**data)
+    db.add(db_user)
+    db.commit()
+    return load_user_response(db, db_user.id, set())
+
+def find_user_by_name(db: Session, full_name: str) -> User | None:
+    return db.query(User).filter(User.full_name == full_name).first()
+
+def update_password_hash(db: Session, user_id: int, password_hash: str):
+    db.query(User).filter(User.id == user_id).update({User.password: password_hash})
+    db.commit()
+
+def load_user_response(db: Session, user_id: int, include: set[str]) -> UserDTOResponse:
+    """One query for the user and its totals, plus one selectin query per included list"""
+    options = [undefer_group("totals")]
+    options += [selectinload(getattr(User, relationship)) for relationship in sorted(include)]
+    user = db.query(User).options(*options).filter(User.id == user_id).one()
+    return build_user_response(user, include)
+
+def load_identity(db: Session, user_id: int) -> CurrentUserDTO | None:
+    """Primary key lookup of the columns needed to authenticate a request"""
+    row = db.execute(select(User.id, User.full_name).where(User.id == user_id)).first()
+    return CurrentUserDTO(id=row.id, full_name=row.full_name) if row else None
+
+def invalidate_user(user_id: int):
+    USER_CACHE.invalidate(user_id)
+
+# Any ORM update or delete of a user drops its cached identity in this process;
+# other workers pick the change up when USER_CACHE_TTL expires
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def on_user_changed(mapper, connection, target):
+    invalidate_user(target.id)
@@ -1,6 +1,12 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from functools import lru_cache
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
+
+from app.dataBase.pool_metrics import TimedQueuePool, TimedAsyncQueuePool, instrument_pool
+from app.dataBase.sql_metrics import instrument_engine
 
 # Database connection data
 username = os.getenv("DB_USER", "root")
@@ -9,14 +15,108 @@ server = os.getenv("DB_HOST", "localhost")
 connectionPort = os.getenv("DB_PORT", "3306")
 dataBaseName = os.getenv("DB_NAME", "financeDB")
 
-# Full DB connection string
-dataBaseConnection = f"mysql+pymysql://{username}:{userPassword}@{server}:{connectionPort}/{dataBaseName}"
+# Full DB connection strings (DATABASE_URL / ASYNC_DATABASE_URL override them, e.g. for SQLite)
+dataBaseConnection = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{username}:{userPassword}@{server}:{connectionPort}/{dataBaseName}"
+)
+asyncDataBaseConnection = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{username}:{userPassword}@{server}:{connectionPort}/{dataBaseName}"
+)
+
+# DB_ASYNC=true serves requests with an AsyncSession on the async driver
+asyncMode = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Connection pool tuning
+poolSize = int(os.getenv("DB_POOL_SIZE", 5))
+poolMaxOverflow = int(os.getenv("DB_MAX_OVERFLOW", 10))
+poolRecycle = int(os.getenv("DB_POOL_RECYCLE", 1800))
+poolTimeout = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# "always" pings on every checkout; "recycle" skips the ping and relies on
+# DB_POOL_RECYCLE plus invalidation of connections that fail on use
+poolPrePing = os.getenv("DB_POOL_PRE_PING", "always").lower()
+if poolPrePing not in ("always", "recycle"):
+    raise ValueError("DB_POOL_PRE_PING must be 'always' or 'recycle'")
+
+# Connections opened per worker at startup so the first requests skip the connect
+poolWarmup = int(os.getenv("DB_POOL_WARMUP", poolSize))
+
+poolOptions = {
+    "pool_size": poolSize,
+    "max_overflow": poolMaxOverflow,
+    "pool_recycle": poolRecycle,
+    "pool_timeout": poolTimeout,
+    "pool_pre_ping": poolPrePing == "always",
+}
+
+# Engines are created on first use, so importing the app never touches the
+# database driver or the network (creating an engine does not connect either)
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """Sync engine with the tuned, instrumented pool"""
+    engine = create_engine(dataBaseConnection, poolclass=TimedQueuePool, **poolOptions)
+    instrument_pool(engine, "sync")
+    instrument_engine(engine)
+    return engine
 
-# Create engine with pre-ping
-engine = create_engine(dataBaseConnection, pool_pre_ping=True)
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine | None:
+    """Async engine, only in async mode"""
+    if not asyncMode:
+        return None
+    async_engine = create_async_engine(asyncDataBaseConnection, poolclass=TimedAsyncQueuePool, **poolOptions)
+    instrument_pool(async_engine.sync_engine, "async")
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Session factories, bound to the engines when a session is opened
+sessionFactory = sessionmaker(autocommit=False, autoflush=False)
+asyncSessionFactory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+def SessionLocal(**kwargs) -> Session:
+    return sessionFactory(bind=get_engine(), **kwargs)
+
+def AsyncSessionLocal(**kwargs) -> AsyncSession:
+    return asyncSessionFactory(bind=get_async_engine(), **kwargs)
+
+async def warm_up_pools(size: int = poolWarmup):
+    """Open size connections at once and return them to the pool of the engine that serves requests"""
+    if size <= 0:
+        return
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        connections = []
+        try:
+            for _ in range(size):
+                connections.append(await async_engine.connect())
+        finally:
+            for connection in connections:
+                await connection.close()
+        return
+    def warm_up_sync():
+        connections = []
+        try:
+            for _ in range(size):
+                connections.append(get_engine().connect())
+        finally:
+            for connection in connections:
+                connection.close()
+    await run_in_threadpool(warm_up_sync)
+
+async def dispose_engines():
+    """Close pooled connections of the engines that were created"""
+    if get_async_engine.cache_info().currsize and get_async_engine() is not None:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
 
 # Base class for models
 Base = declarative_base()
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run fn(session, *args, **kwargs) without blocking the event loop.
+    AsyncSession runs it through run_sync on the async driver, a sync Session in the threadpool."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,15 @@
+import os
+from alembic import command
+from alembic.config import Config
+
+# alembic.ini lives at the backend root, next to main.py
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+def alembic_config() -> Config:
+    config = Config(os.path.abspath(ALEMBIC_INI))
+    config.set_main_option("script_location", os.path.abspath(os.path.join(os.path.dirname(ALEMBIC_INI), "migrations")))
+    return config
+
+def upgrade_database(revision: str = "head"):
+    """Same as `alembic upgrade head`, for scripts that prepare a fresh database"""
+    command.upgrade(alembic_config(), revision)
@@ -0,0 +1,119 @@
+import time
+import threading
+from bisect import bisect_left
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# =========================
+# Histogram
+# =========================
+class Histogram:
+    """Thread safe fixed bucket histogram, cumulative like Prometheus"""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {"buckets": buckets, "count": self.count, "sum": round(self.total, 6)}
+
+# =========================
+# Pool statistics
+# =========================
+class PoolStats:
+    def __init__(self):
+        self.wait = Histogram()
+        self.checkout_latency = Histogram()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.max_checked_out = 0
+
+    def snapshot(self, pool) -> dict:
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else None
+        return {
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait.snapshot(),
+            "checkout_latency_seconds": self.checkout_latency.snapshot(),
+        }
+
+# One entry per engine, kept outside the pools because dispose() recreates them
+POOL_STATS = {"sync": PoolStats(), "async": PoolStats()}
+
+class TimedPoolMixin:
+    """Times pool checkouts: wait is the time spent getting a connection from the
+    queue (or opening one), checkout latency adds pre-ping and checkout events"""
+    stats_key = "sync"
+
+    def connect(self):
+        start = time.perf_counter()
+        connection = super().connect()
+        POOL_STATS[self.stats_key].checkout_latency.observe(time.perf_counter() - start)
+        return connection
+
+    def _do_get(self):
+        stats = POOL_STATS[self.stats_key]
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.wait.observe(time.perf_counter() - start)
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    stats_key = "sync"
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    stats_key = "async"
+
+def instrument_pool(engine, stats_key: str):
+    """Feed POOL_STATS[stats_key] from the pool events of an engine"""
+    stats = POOL_STATS[stats_key]
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+        checked_out = engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0
+        stats.max_checked_out = max(stats.max_checked_out, checked_out)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+def pool_stats(engines: dict) -> dict:
+    """Snapshot of every configured engine pool, keyed like POOL_STATS"""
+    return {key: POOL_STATS[key].snapshot(engine.pool) for key, engine in engines.items() if engine is not None}
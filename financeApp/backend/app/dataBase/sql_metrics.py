@@ -0,0 +1,126 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from sqlalchemy import event
+
+from app.dataBase.pool_metrics import Histogram
+
+# Fraction of requests that are instrumented, 0 disables the middleware
+SQL_METRICS_SAMPLE_RATE = float(os.getenv("SQL_METRICS_SAMPLE_RATE", 0))
+# Identical statements repeated this many times in one request are reported as N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+
+logger = logging.getLogger("finance.sql")
+
+# =========================
+# Per-request statistics
+# =========================
+class RequestStats:
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.statements += 1
+        self.db_time += duration
+        self.shapes[statement] += 1
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def repeated_shapes(self) -> dict:
+        return {shape: count for shape, count in self.shapes.items() if count >= SQL_N_PLUS_ONE_THRESHOLD}
+
+# Stats of the request running in the current context, None when not sampled
+current_stats: ContextVar = ContextVar("current_sql_stats", default=None)
+
+def should_sample() -> bool:
+    return SQL_METRICS_SAMPLE_RATE >= 1 or random.random() < SQL_METRICS_SAMPLE_RATE
+
+def instrument_engine(engine):
+    """Time every cursor execution of engine into the current request stats"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_stats.get() is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_stats.get()
+        start = getattr(context, "_query_start", None)
+        if stats is not None and start is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+# =========================
+# Aggregated statistics (Prometheus)
+# =========================
+class SQLMetrics:
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.statements = defaultdict(int)
+        self.db_seconds = defaultdict(float)
+        self.n_plus_one = defaultdict(int)
+        self.db_time = Histogram()
+        self.statements_per_request = Histogram((1, 2, 3, 5, 10, 20, 50, 100, 500))
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, stats: RequestStats):
+        repeated = stats.repeated_shapes()
+        with self._lock:
+            self.requests[route] += 1
+            self.statements[route] += stats.statements
+            self.db_seconds[route] += stats.db_time
+            if repeated:
+                self.n_plus_one[route] += 1
+        self.db_time.observe(stats.db_time)
+        self.statements_per_request.observe(stats.statements)
+        if repeated:
+            shape, count = max(repeated.items(), key=lambda item: item[1])
+            logger.warning("Possible N+1 on %s: %d x %s", route, count, " ".join(shape.split())[:200])
+
+SQL_METRICS = SQLMetrics()
+
+# =========================
+# Middleware
+# =========================
+class SQLMetricsMiddleware:
+    """Pure ASGI middleware: instruments a sample of requests, adds a
+    Server-Timing header and feeds SQL_METRICS"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not should_sample():
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing = (
+                    f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statements} queries", '
+                    f"db-slowest;dur={stats.slowest_time * 1000:.2f}, "
+                    f"app;dur={(time.perf_counter() - start) * 1000:.2f}"
+                )
+                if stats.repeated_shapes():
+                    timing += ', n-plus-one;desc="repeated statements"'
+                message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            route = scope.get("route")
+            SQL_METRICS.observe(getattr(route, "path", "unmatched"), stats)
@@ -0,0 +1,37 @@
+import os
+from sqlalchemy import select, update, func
+
+from app.dataBase.configuration import SessionLocal
+from app.api.models.tablesSQL import Expense
+from app.api.services.categories import matching_category_id
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", 5000))
+
+# =========================
+# Expense.category_id migration
+# =========================
+# The column itself comes from migration 0005. This re-resolves category_id
+# for rows that have none, in id windows of BACKFILL_BATCH_SIZE.
+
+def backfill_category_ids(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Resolve category_id for rows that have none; user categories win over globals"""
+    match = matching_category_id()
+    updated = 0
+    with SessionLocal() as session:
+        last_id = session.scalar(select(func.max(Expense.id))) or 0
+        for start in range(0, last_id, batch_size):
+            result = session.execute(
+                update(Expense)
+                .where(Expense.id > start, Expense.id <= start + batch_size, Expense.category_id.is_(None))
+                .values(category_id=match)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            updated += result.rowcount
+    return updated
+
+def main():
+    print(f"Backfilled category_id on {backfill_category_ids()} expenses")
+
+if __name__ == "__main__":
+    main()
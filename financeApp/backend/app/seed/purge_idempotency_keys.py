@@ -0,0 +1,16 @@
+from app.dataBase.configuration import SessionLocal
+from app.api.services.batch import purge_idempotency_keys
+
+# Periodic cleanup (e.g. a daily cron) of keys older than IDEMPOTENCY_KEY_TTL;
+# keyed batches already purge the expired keys of their own user
+def main():
+    session = SessionLocal()
+    try:
+        purged = purge_idempotency_keys(session)
+        session.commit()
+    finally:
+        session.close()
+    print(f"Purged {purged} expired idempotency keys")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from app.dataBase.configuration import SessionLocal
+from app.api.services.rollups import rebuild_rollups
+
+# One-off backfill of monthly_rollups from existing expenses and incomes
+def main():
+    session = SessionLocal()
+    try:
+        rebuild_rollups(session)
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from app.dataBase.configuration import engine, SessionLocal, Base
+from sqlalchemy import insert, select, literal, null, true, exists, union_all, text
+from app.dataBase.configuration import get_engine
 from app.api.models.tablesSQL import Category
 from datetime import date
 
@@ -12,23 +13,49 @@ DEFAULT_CATEGORIES = [
     {"name": "Others", "description": "Miscellaneous"},
 ]
 
+def seed_statement():
+    """INSERT ... SELECT of the defaults WHERE NOT EXISTS, a no-op once they are seeded"""
+    defaults = union_all(*[
+        select(literal(cat["name"]).label("name"), literal(cat["description"]).label("description"))
+        for cat in DEFAULT_CATEGORIES
+    ]).subquery("defaults")
+    already_seeded = exists().where(Category.user_id.is_(None), Category.name == defaults.c.name)
+    return insert(Category).from_select(
+        ["name", "description", "value", "date", "is_global", "user_id"],
+        select(defaults.c.name, defaults.c.description, literal(0.0), literal(date.today()), true(), null())
+        .where(~already_seeded),
+    )
+
+# Nothing unique backs the NOT EXISTS (globals have user_id NULL), so workers that
+# boot together take a named lock around the statement instead of racing on it
+SEED_LOCK_NAME = "finance_seed_categories"
+SEED_LOCK_TIMEOUT = 30
+
 def seed_categories():
-    Base.metadata.create_all(bind=engine)
-    session = SessionLocal()
-    try:
-        for cat in DEFAULT_CATEGORIES:
-            exists = session.query(Category).filter_by(name=cat["name"]).first()
-            if not exists:
-                session.add(Category(
-                    name=cat["name"],
-                    description=cat["description"],
-                    is_global=True if hasattr(Category, "is_global") else False,
-                    user_id=None,
-                    date=date.today()
-                ))
-        session.commit()
-    finally:
-        session.close()
+    """Insert the missing defaults, one process at a time. MySQL uses GET_LOCK, PostgreSQL an
+    advisory transaction lock; SQLite already runs one writer at a time."""
+    # The schema is created by `alembic upgrade head`
+    lock = {"name": SEED_LOCK_NAME, "timeout": SEED_LOCK_TIMEOUT}
+    with get_engine().connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == "mysql":
+            acquired = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), lock).scalar()
+            # The seed then runs in a fresh transaction that sees rows committed by the lock holder
+            conn.commit()
+            if acquired != 1:
+                raise RuntimeError("Timed out waiting for the category seed lock")
+        elif dialect == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": SEED_LOCK_NAME})
+        try:
+            conn.execute(seed_statement())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if dialect == "mysql":
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SEED_LOCK_NAME})
+                conn.commit()
 
 if __name__ == "__main__":
     seed_categories()
@@ -0,0 +1,52 @@
+import os
+import asyncio
+import threading
+from collections import defaultdict
+
+# =========================
+# In-process alert broker
+# =========================
+# Fans alert events out to the SSE streams open on this worker. publish() is
+# thread safe (it runs from the commit hook, in the threadpool); subscribers
+# consume on their event loop. Events of writes handled by another worker are
+# not seen here.
+
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", 100))
+
+class AlertBroker:
+    def __init__(self, queue_size: int = ALERT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)  # user_id -> {(loop, queue)}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Call from the event loop that will consume the queue"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                pass  # loop already closed
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass  # a client that stopped reading loses events instead of growing memory
+
+ALERT_BROKER = AlertBroker()
@@ -0,0 +1,101 @@
+import os
+import io
+import csv
+import json
+from typing import BinaryIO, Iterator
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.api.services.rollups import RollupDelta
+from app.api.services.categories import attach_category_ids
+
+# Rows sent to the database per executemany batch
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+# Upper bound of the per-row error report, keeps memory flat for broken files
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", 1000))
+
+BULK_FORMATS = ("csv", "ndjson")
+
+def detect_format(filename: str | None, content_type: str | None) -> str:
+    """Guess the upload format from the file name or content type, CSV by default"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+def iter_records(binary_file: BinaryIO, fmt: str) -> Iterator[tuple[int, dict | Exception]]:
+    """Yield (line number, record) pairs one at a time; unparsable lines yield the error"""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, e
+    finally:
+        # The upload owns the underlying file, do not close it with the wrapper
+        text.detach()
+
+def describe_error(error: Exception) -> str:
+    """Short, single line description of a row error"""
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors())
+    if isinstance(error, SQLAlchemyError):
+        # The driver message only, without the statement and its parameters
+        return f"database error: {str(getattr(error, 'orig', None) or error).splitlines()[0]}"
+    return str(error)
+
+def import_records(db: Session, model, dto: type[BaseModel], records, user_id: int, chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """Validate records incrementally and insert them in executemany batches of chunk_size.
+    Every chunk commits on its own: a database error rolls back and fails only that chunk's rows."""
+    inserted, failed, errors = 0, 0, []
+    batch, line_nos = [], []
+
+    def fail(line_no: int, error: Exception):
+        nonlocal failed
+        failed += 1
+        if len(errors) < BULK_MAX_ERRORS:
+            errors.append({"row": line_no, "error": describe_error(error)})
+
+    def flush():
+        nonlocal inserted
+        try:
+            attach_category_ids(db, model, batch, user_id)
+            db.execute(insert(model), batch)
+            delta = RollupDelta()
+            for row in batch:
+                delta.add_item(model, row)
+            delta.apply(db)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            for line_no in line_nos:
+                fail(line_no, e)
+            return
+        inserted += len(batch)
+
+    for line_no, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            item = dto.model_validate(record)
+        except (ValueError, TypeError) as e:
+            fail(line_no, e)
+            continue
+        batch.append({**item.model_dump(), "user_id": user_id})
+        line_nos.append(line_no)
+        if len(batch) >= chunk_size:
+            flush()
+            batch, line_nos = [], []
+    if batch:
+        flush()
+    return {"inserted": inserted, "failed": failed, "errors": errors}
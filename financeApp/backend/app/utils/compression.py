@@ -0,0 +1,19 @@
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# =========================
+# Response compression
+# =========================
+class SelectiveGZipMiddleware:
+    """GZip except for streaming paths (SSE), where the compressor would hold events back"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, exclude_paths: tuple[str, ...] = ()):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
@@ -0,0 +1,70 @@
+import os
+import io
+import csv
+import json
+from typing import Iterator
+from sqlalchemy import select, literal
+
+from app.dataBase.configuration import SessionLocal
+from app.api.models.tablesSQL import Expense, Income
+
+# Rows fetched from the server-side cursor and encoded per chunk
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+
+EXPORT_COLUMNS = ["type", "id", "date", "description", "category", "amount"]
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def ledger_queries(user_id: int):
+    """Yield (type, select) pairs covering the whole ledger of a user"""
+    yield "expense", (
+        select(Expense.id, Expense.date, Expense.description, Expense.category, Expense.amount)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.date, Expense.id)
+    )
+    yield "income", (
+        select(Income.id, Income.date, Income.description, literal(None).label("category"), Income.amount)
+        .where(Income.user_id == user_id)
+        .order_by(Income.date, Income.id)
+    )
+
+def iter_ledger_chunks(user_id: int, chunk_size: int) -> Iterator[tuple[str, list]]:
+    """Read the ledger through a server-side cursor, chunk_size rows at a time.
+    Opens its own session because the response outlives the request dependencies."""
+    db = SessionLocal()
+    try:
+        for kind, query in ledger_queries(user_id):
+            result = db.execute(query.execution_options(yield_per=chunk_size))
+            for rows in result.partitions():
+                yield kind, rows
+    finally:
+        db.close()
+
+def export_csv(user_id: int, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for kind, rows in iter_ledger_chunks(user_id, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (kind, row.id, row.date.isoformat(), row.description, row.category or "", row.amount)
+            for row in rows
+        )
+        yield buffer.getvalue()
+
+def export_ndjson(user_id: int, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    for kind, rows in iter_ledger_chunks(user_id, chunk_size):
+        yield "".join(
+            json.dumps({
+                "type": kind,
+                "id": row.id,
+                "date": row.date.isoformat(),
+                "description": row.description,
+                "category": row.category,
+                "amount": row.amount,
+            }) + "\n"
+            for row in rows
+        )
+
+EXPORTERS = {"csv": export_csv, "ndjson": export_ndjson}
@@ -0,0 +1,66 @@
+import os
+import base64
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Page size limits for the list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    """Return an opaque cursor pointing at the (date, id) of the last row of a page"""
+    raw = f"{row_date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """Return the (date, id) stored in a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor of ranked results, which have no stable (date, id) order"""
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, raw_offset = base64.urlsafe_b64decode(padded).decode().split("|")
+        if prefix != "offset":
+            raise ValueError(prefix)
+        return max(int(raw_offset), 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def range_filters(date_column, amount_column, date_from=None, date_to=None, min_amount=None, max_amount=None) -> list:
+    """Return the criteria of the optional date range and amount range filters"""
+    criteria = []
+    if date_from is not None:
+        criteria.append(date_column >= date_from)
+    if date_to is not None:
+        criteria.append(date_column <= date_to)
+    if min_amount is not None:
+        criteria.append(amount_column >= min_amount)
+    if max_amount is not None:
+        criteria.append(amount_column <= max_amount)
+    return criteria
+
+def paginate(db, statement, model, cursor: str | None, limit: int, date_column=None):
+    """Keyset pagination of a select on (date, id), newest first. Returns (rows, next_cursor).
+    date_column defaults to model.date"""
+    date_column = model.date if date_column is None else date_column
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        statement = statement.where(or_(
+            date_column < cursor_date,
+            and_(date_column == cursor_date, model.id < cursor_id),
+        ))
+    rows = db.execute(statement.order_by(date_column.desc(), model.id.desc()).limit(limit + 1)).all()
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        return rows[:limit], encode_cursor(getattr(last, date_column.key), last.id)
+    return rows, None
@@ -0,0 +1,23 @@
+# =========================
+# Prometheus text format helpers
+# =========================
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+def metric_family(name: str, kind: str, help_text: str, samples: list) -> list:
+    """samples: (labels, value) pairs"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{format_labels(labels)} {value}" for labels, value in samples]
+    return lines
+
+def histogram_family(name: str, help_text: str, histograms: list) -> list:
+    """histograms: (labels, Histogram.snapshot()) pairs"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, snapshot in histograms:
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {snapshot['sum']}")
+        lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
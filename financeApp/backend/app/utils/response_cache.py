@@ -0,0 +1,121 @@
+import os
+import hashlib
+from uuid import uuid4
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+# RESPONSE_CACHE_URL=redis://host:6379/0 shares versions and payloads across
+# workers (any Redis compatible server). Without it each worker keeps its own
+# in-process cache, which is only coherent with a single worker.
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+# =========================
+# Backends
+# =========================
+class MemoryCacheBackend:
+    """Per-user version counters plus an LRU of payloads bounded by total size"""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        # Versions restart at 0 with the process, the epoch keeps old ETags from matching
+        self.epoch = uuid4().hex[:8]
+        self.max_bytes = max_bytes
+        self.versions = {}
+        self.payloads = OrderedDict()
+        self.size = 0
+
+    async def get_version(self, user_id: int) -> str:
+        return f"{self.epoch}.{self.versions.get(user_id, 0)}"
+
+    async def bump_version(self, user_id: int):
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
+
+    async def get(self, key: str) -> bytes | None:
+        payload = self.payloads.get(key)
+        if payload is not None:
+            self.payloads.move_to_end(key)
+        return payload
+
+    async def set(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        previous = self.payloads.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.payloads[key] = payload
+        self.size += len(payload)
+        while self.size > self.max_bytes:
+            _, evicted = self.payloads.popitem(last=False)
+            self.size -= len(evicted)
+
+def random_start() -> int:
+    return uuid4().int >> 80  # 48 random bits, far from INCR's 64-bit limit
+
+class RedisCacheBackend:
+    """Same interface on a Redis compatible server (redis package)"""
+
+    def __init__(self, url: str, ttl: int = RESPONSE_CACHE_TTL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_URL requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+
+    # A missing version key (new user, FLUSHALL, eviction) starts again from a random
+    # value rather than 0, which plays the role of the memory backend's epoch
+    async def get_version(self, user_id: int) -> str:
+        key = f"finance:version:{user_id}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(key, random_start(), nx=True)
+            pipe.get(key)
+            _, version = await pipe.execute()
+        return version.decode()
+
+    async def bump_version(self, user_id: int):
+        key = f"finance:version:{user_id}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(key, random_start(), nx=True)
+            pipe.incr(key)
+            await pipe.execute()
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(f"finance:payload:{key}")
+
+    async def set(self, key: str, payload: bytes):
+        await self.client.set(f"finance:payload:{key}", payload, ex=self.ttl)
+
+cache_backend = RedisCacheBackend(RESPONSE_CACHE_URL) if RESPONSE_CACHE_URL else MemoryCacheBackend()
+
+# =========================
+# Helpers
+# =========================
+async def bump_user_version(user_id: int):
+    """Call after every committed write that changes what a user can read"""
+    await cache_backend.bump_version(user_id)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+async def cached_response(request: Request, user_id: int, build: Callable[[], Awaitable[BaseModel]]) -> Response:
+    """Serve a per-user read with a weak ETag: 304 when the client copy is current,
+    the cached payload when this version was already serialized, build() otherwise"""
+    version = await cache_backend.get_version(user_id)
+    target = f"{request.url.path}?{request.url.query}"
+    # Versions are per user and start equal, the user id keeps one user's ETag from matching another's
+    etag = f'W/"{user_id}.{version}-{hashlib.sha1(target.encode()).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    key = f"{user_id}:{version}:{target}"
+    payload = await cache_backend.get(key)
+    if payload is None:
+        payload = (await build()).model_dump_json().encode()
+        await cache_backend.set(key, payload)
+    return Response(content=payload, media_type="application/json", headers=headers)
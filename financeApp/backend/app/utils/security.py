@@ -1,7 +1,31 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 
+# bcrypt cost factor. Hashes with a different cost still verify and are
+# flagged by verify_and_update so login can transparently rehash them
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Dedicated hashing workers (bcrypt releases the GIL) and how many jobs may
+# wait for them before new requests are rejected
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 4))
+
 # Password context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full"""
 
 def hash_password(password: str) -> str:
     """Return hashed password"""
@@ -10,3 +34,21 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
     return pwd_context.verify(plain_password, hashed_password)
+
+async def _run_hasher(fn, *args):
+    """Run fn on the hashing pool, PasswordHasherBusy when the queue is full"""
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    """Return hashed password, computed on the hashing pool"""
+    return await _run_hasher(pwd_context.hash, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify on the hashing pool. Returns (valid, new hash or None when the
+    stored hash already matches the current context parameters)"""
+    return await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,24 @@
+import os
+
+# Benchmarks default to a local SQLite file so they run without a MySQL server.
+# Point BENCH_DATABASE_URL / BENCH_ASYNC_DATABASE_URL at a local MySQL container to
+# bench it instead. The app's own DATABASE_URL is never used: the seeder drops every table.
+BENCH_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench.db")
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{BENCH_DB_PATH}")
+BENCH_ASYNC_DATABASE_URL = os.getenv(
+    "BENCH_ASYNC_DATABASE_URL",
+    None if os.getenv("BENCH_DATABASE_URL") else f"sqlite+aiosqlite:///{BENCH_DB_PATH}",
+)
+
+def is_default_database() -> bool:
+    return BENCH_DATABASE_URL == f"sqlite:///{BENCH_DB_PATH}"
+
+def configure():
+    """Set the environment before any app module is imported"""
+    if not BENCH_ASYNC_DATABASE_URL:
+        raise SystemExit("BENCH_DATABASE_URL needs BENCH_ASYNC_DATABASE_URL as well")
+    os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+    os.environ["ASYNC_DATABASE_URL"] = BENCH_ASYNC_DATABASE_URL
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", "1024")
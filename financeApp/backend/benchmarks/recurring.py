@@ -0,0 +1,87 @@
+"""Measure recurring rule materialization throughput on the benchmark database.
+
+    python -m benchmarks.seed
+    python -m benchmarks.recurring --rules 20000 --batch-size 1000
+
+Rules are spread over the benchmark users with one due occurrence each, drained
+with the scheduler's materialize_due, then removed again with their rows.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.env import configure
+from benchmarks.seed import BENCH_USER_PREFIX, CATEGORIES
+
+RULE_DESCRIPTION = "bench-recurring"
+
+def bench(rules: int, batch_size: int, random_seed: int = 42) -> dict:
+    configure()
+    from sqlalchemy import insert, select, delete
+    from app.dataBase.configuration import SessionLocal
+    from app.api.models.tablesSQL import User, Expense, Income, RecurringRule
+    from app.api.services.recurring import materialize_due
+    from app.api.services.rollups import rebuild_rollups
+
+    rng = random.Random(random_seed)
+    today = date.today()
+    with SessionLocal() as session:
+        user_ids = session.execute(select(User.id).where(User.full_name.like(f"{BENCH_USER_PREFIX}%"))).scalars().all()
+        if not user_ids:
+            raise SystemExit("No benchmark users found, run `python -m benchmarks.seed` first")
+        rows = []
+        for _ in range(rules):
+            kind = rng.choice(("expense", "income"))
+            start = today - timedelta(days=rng.randint(0, 27))
+            rows.append({
+                "kind": kind,
+                "description": RULE_DESCRIPTION,
+                "category": rng.choice(CATEGORIES) if kind == "expense" else None,
+                "amount": round(rng.uniform(1, 500), 2),
+                "frequency": "monthly",
+                "start_date": start,
+                "end_date": None,
+                "runs": 0,
+                "next_run": start,
+                "active": True,
+                "user_id": rng.choice(user_ids),
+            })
+        session.execute(insert(RecurringRule), rows)
+        session.commit()
+
+        materialized, batches = 0, 0
+        start_time = time.perf_counter()
+        while True:
+            count, _ = materialize_due(session, today, batch_size)
+            if not count:
+                break
+            materialized += count
+            batches += 1
+        elapsed = time.perf_counter() - start_time
+
+        session.execute(delete(RecurringRule).where(RecurringRule.description == RULE_DESCRIPTION))
+        for model in (Expense, Income):
+            session.execute(delete(model).where(model.description == RULE_DESCRIPTION))
+        rebuild_rollups(session)
+        session.commit()
+
+    return {
+        "rules": materialized,
+        "batches": batches,
+        "seconds": round(elapsed, 3),
+        "rules_per_second": round(materialized / elapsed, 1) if elapsed else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    result = bench(args.rules, args.batch_size, args.seed)
+    print(f"Materialized {result['rules']} rules in {result['batches']} batches, "
+          f"{result['seconds']}s ({result['rules_per_second']} rules/s)")
+
+if __name__ == "__main__":
+    main()
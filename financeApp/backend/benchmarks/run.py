@@ -0,0 +1,255 @@
+"""Drive the FastAPI app in-process through an ASGI client and report per endpoint
+latency percentiles, requests/sec, SQL queries per request and how much the
+workload grew the resident set size.
+
+    python -m benchmarks.seed --users 20 --expenses 1000
+    python -m benchmarks.run --concurrency 16 --requests 500
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --max-regression 0.15
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import resource
+from contextvars import ContextVar
+
+from benchmarks.env import configure
+from benchmarks.seed import BENCH_PASSWORD, BENCH_USER_PREFIX, CATEGORIES, DESCRIPTIONS
+
+# Queries executed by the request running in the current task
+query_counter: ContextVar = ContextVar("query_counter", default=None)
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+def rss_mb() -> float:
+    """Current RSS from /proc on Linux; elsewhere the process high-water mark, which never
+    goes down, so a workload only shows growth when it sets a new peak"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+# =========================
+# Workloads
+# =========================
+# Each workload builds one request (method, url, kwargs, token) from the worker's
+# token; rows created by a token are updated and deleted with a token owning them
+def random_expense(rng: random.Random) -> dict:
+    return {
+        "description": f"bench {rng.randint(1, 9999)}",
+        "category": rng.choice(CATEGORIES),
+        "amount": round(rng.uniform(1, 500), 2),
+        "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+
+def signup(state, rng, token):
+    return "POST", "/signup", {"json": {
+        "full_name": f"bench_new_{uuid.uuid4().hex}",
+        "birth_date": "1990-01-01",
+        "location": "Benchmark",
+        "savings_goal": 1000,
+        "password": BENCH_PASSWORD,
+    }}, token
+
+def login(state, rng, token):
+    return "POST", "/login", {"data": {"username": rng.choice(state["usernames"]), "password": BENCH_PASSWORD}}, token
+
+def users_me(state, rng, token):
+    return "GET", "/users/me", {}, token
+
+def create_expense(state, rng, token):
+    return "POST", "/expenses", {"json": random_expense(rng)}, token
+
+def list_expenses(state, rng, token):
+    # A different filter on every call misses the response cache
+    return "GET", f"/expenses?max_amount={rng.uniform(1, 500):.4f}", {}, token
+
+def list_expenses_cached(state, rng, token):
+    return "GET", "/expenses", {}, token
+
+def analytics_summary(state, rng, token):
+    return "GET", "/analytics/summary", {}, token
+
+def search(state, rng, token):
+    # Word prefix plus an amount filter that misses the response cache
+    return "GET", f"/search?q={rng.choice(DESCRIPTIONS)[:3]}&max_amount={rng.uniform(1, 500):.4f}", {}, token
+
+def owned_expense(state, token: str, pop: bool) -> tuple[int, str]:
+    """An expense created by token, or by any token when it has none left"""
+    created = state["created"]
+    owner = token if created.get(token) else next((other for other, ids in created.items() if ids), token)
+    ids = created.get(owner)
+    if not ids:
+        return 0, owner
+    return (ids.pop() if pop else ids[-1]), owner
+
+def update_expense(state, rng, token):
+    expense_id, owner = owned_expense(state, token, pop=False)
+    return "PUT", f"/expenses/{expense_id}", {"json": random_expense(rng)}, owner
+
+def delete_expense(state, rng, token):
+    expense_id, owner = owned_expense(state, token, pop=True)
+    return "DELETE", f"/expenses/{expense_id}", {}, owner
+
+WORKLOADS = {
+    "signup": signup,
+    "login": login,
+    "users_me": users_me,
+    "create_expense": create_expense,
+    "list_expenses": list_expenses,
+    "list_expenses_cached": list_expenses_cached,
+    "analytics_summary": analytics_summary,
+    "search": search,
+    "update_expense": update_expense,
+    "delete_expense": delete_expense,
+}
+
+# =========================
+# Runner
+# =========================
+async def run_workload(client, name: str, state: dict, requests: int, concurrency: int, rng: random.Random) -> dict:
+    latencies, queries, statuses = [], [], {}
+    remaining = [requests]
+    # RSS is sampled after every request: the peak above the starting RSS is this workload's growth
+    rss = [rss_mb()] * 2
+
+    async def worker(token: str):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            method, url, kwargs, owner = WORKLOADS[name](state, rng, token)
+            counter = [0]
+            reset = query_counter.set(counter)
+            start = time.perf_counter()
+            response = await client.request(method, url, headers={"Authorization": f"Bearer {owner}"}, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            query_counter.reset(reset)
+            queries.append(counter[0])
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            rss[1] = max(rss[1], rss_mb())
+            if name == "create_expense" and response.status_code == 200:
+                state["created"].setdefault(token, []).append(response.json()["id"])
+
+    tokens = state["tokens"]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(tokens[i % len(tokens)]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rps": round(requests / elapsed, 1),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+        "rss_growth_mb": round(rss[1] - rss[0], 1),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+    }
+
+async def run(names: list, requests: int, concurrency: int, random_seed: int) -> dict:
+    configure()
+    import httpx
+    from sqlalchemy import event, select
+    from main import app
+    from app.dataBase.configuration import get_engine, get_async_engine, dispose_engines, SessionLocal
+    from app.api.models.tablesSQL import User
+
+    async_engine = get_async_engine()
+    event.listen(get_engine(), "before_cursor_execute", count_query)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+
+    session = SessionLocal()
+    try:
+        usernames = session.execute(
+            select(User.full_name).where(User.full_name.like(f"{BENCH_USER_PREFIX}%")).limit(max(concurrency, 1))
+        ).scalars().all()
+    finally:
+        session.close()
+    if not usernames:
+        raise SystemExit("No benchmark users found, run `python -m benchmarks.seed` first")
+
+    rng = random.Random(random_seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tokens = []
+        for username in usernames:
+            response = await client.post("/login", data={"username": username, "password": BENCH_PASSWORD})
+            tokens.append(response.json()["access_token"])
+        state = {"usernames": usernames, "tokens": tokens, "created": {}}
+        for name in names:
+            results[name] = await run_workload(client, name, state, requests, concurrency, rng)
+            print(format_row(name, results[name]), flush=True)
+    # Async driver connections run on their own threads and keep the process alive
+    await dispose_engines()
+    return results
+
+# =========================
+# Reporting
+# =========================
+COLUMNS = ("p50_ms", "p95_ms", "p99_ms", "rps", "queries_per_request", "rss_growth_mb", "errors")
+
+def format_row(name: str, result: dict) -> str:
+    return f"{name:<22}" + "".join(f"{result[column]:>21}" for column in COLUMNS)
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Return a line per endpoint whose p95 or requests/sec regressed beyond max_regression"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        p95_change = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps_change = (result["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        print(f"{name:<22} p95 {p95_change:+.1%}  rps {rps_change:+.1%}  "
+              f"queries {base['queries_per_request']} -> {result['queries_per_request']}")
+        if p95_change > max_regression or rps_change < -max_regression:
+            regressions.append(f"{name}: p95 {p95_change:+.1%}, rps {rps_change:+.1%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="comma separated, run in order")
+    parser.add_argument("--requests", type=int, default=200, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare against a stored JSON baseline")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)}")
+
+    print(f"{'endpoint':<22}" + "".join(f"{column:>21}" for column in COLUMNS))
+    results = asyncio.run(run(names, args.requests, args.concurrency, args.seed))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.max_regression)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Seed a synthetic dataset for the benchmarks.
+
+    python -m benchmarks.seed --users 50 --expenses 2000 --incomes 200
+
+Drops every table first. A BENCH_DATABASE_URL other than the default SQLite
+file also needs --drop.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.env import BENCH_DATABASE_URL, configure, is_default_database
+
+BENCH_PASSWORD = "benchmark"
+BENCH_USER_PREFIX = "bench_user_"
+CATEGORIES = ["Food", "Transport", "Housing", "Health", "Entertainment", "Savings", "Others"]
+DESCRIPTIONS = ["uber", "netflix", "groceries", "rent", "pharmacy", "cinema", "salary", "freelance", "coffee"]
+
+def random_row(rng: random.Random, user_id: int, with_category: bool) -> dict:
+    row = {
+        "description": f"{rng.choice(DESCRIPTIONS)} {rng.randint(1, 9999)}",
+        "amount": round(rng.uniform(1, 500), 2),
+        "date": date(2020, 1, 1) + timedelta(days=rng.randint(0, 5 * 365)),
+        "user_id": user_id,
+    }
+    if with_category:
+        row["category"] = rng.choice(CATEGORIES)
+    return row
+
+def seed(users: int, expenses: int, incomes: int, batch_size: int = 5000, random_seed: int = 42):
+    """Recreate the schema and fill it with users x (expenses + incomes) rows"""
+    configure()
+    from sqlalchemy import insert, select, text
+    from app.dataBase.configuration import get_engine, Base, SessionLocal
+    from app.dataBase.migrate import upgrade_database
+    from app.api.models.tablesSQL import User, Expense, Income
+    from app.api.services.rollups import rebuild_rollups
+    from app.utils.security import hash_password
+
+    rng = random.Random(random_seed)
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        # Not part of the models: the SQLite search tables and the migration version
+        for name in ("expenses_fts", "incomes_fts", "alembic_version"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    upgrade_database()
+    password = hash_password(BENCH_PASSWORD)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {
+                "full_name": f"{BENCH_USER_PREFIX}{i}",
+                "birth_date": date(1990, 1, 1),
+                "location": "Benchmark",
+                "savings_goal": 10000.0,
+                "password": password,
+            }
+            for i in range(users)
+        ])
+        user_ids = conn.execute(select(User.id)).scalars().all()
+        for model, per_user in ((Expense, expenses), (Income, incomes)):
+            batch = []
+            for user_id in user_ids:
+                for _ in range(per_user):
+                    batch.append(random_row(rng, user_id, model is Expense))
+                    if len(batch) >= batch_size:
+                        conn.execute(insert(model), batch)
+                        batch = []
+            if batch:
+                conn.execute(insert(model), batch)
+
+    session = SessionLocal()
+    try:
+        rebuild_rollups(session)
+    finally:
+        session.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=1000, help="expenses per user")
+    parser.add_argument("--incomes", type=int, default=100, help="incomes per user")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="confirm dropping a BENCH_DATABASE_URL database")
+    args = parser.parse_args()
+    if not is_default_database() and not args.drop:
+        parser.error(f"refusing to drop every table of {BENCH_DATABASE_URL} without --drop")
+    start = time.perf_counter()
+    seed(args.users, args.expenses, args.incomes, args.batch_size, args.seed)
+    total = args.users * (args.expenses + args.incomes)
+    print(f"Seeded {args.users} users and {total} rows in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
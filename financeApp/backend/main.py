@@ -1,15 +1,64 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
 from fastapi import FastAPI
-from app.dataBase.configuration import engine, Base
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.dataBase.configuration import SessionLocal, dispose_engines, warm_up_pools
+from app.dataBase.sql_metrics import SQL_METRICS_SAMPLE_RATE, SQLMetricsMiddleware
 from app.api.routes.endpoints import routes
+from app.api.routes.monitoring import monitoring
+from app.api.routes.analytics import analytics
+from app.api.routes.alerts import alerts
+from app.api.routes.search import search
 from app.seed.seed_categories import seed_categories
+from app.api.services.categories import load_global_categories
+from app.api.services.recurring import RECURRING_INTERVAL, run_scheduler
 from starlette.responses import RedirectResponse
 from starlette.middleware.cors import CORSMiddleware
+from app.utils.compression import SelectiveGZipMiddleware
 
-# Crear todas las tablas
-Base.metadata.create_all(bind=engine)
+# Un solo INSERT idempotente, serializado entre workers; SEED_ON_STARTUP=false si se siembra en el paso de deploy
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Compresión de respuestas desde este tamaño en bytes (0 la desactiva)
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 0))
+# orjson codifica más rápido las listas grandes cuando está instalado
+USE_ORJSON = os.getenv("USE_ORJSON", "true").lower() in ("1", "true", "yes") and find_spec("orjson") is not None
+
+# El esquema lo crean las migraciones (`alembic upgrade head`), no el arranque
+def prepare_data():
+    if SEED_ON_STARTUP:
+        try:
+            seed_categories()
+        except Exception as e:
+            print(f"[WARNING] Could not seed categories: {e}")
+    # Snapshot de categorías globales compartido por todos los requests,
+    # se carga aunque la siembra falle (otro worker o el deploy ya sembró)
+    try:
+        with SessionLocal() as db:
+            load_global_categories(db)
+    except Exception as e:
+        print(f"[WARNING] Could not load global categories: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(prepare_data)
+    try:
+        await warm_up_pools()
+    except Exception as e:
+        print(f"[WARNING] Could not warm up the connection pool: {e}")
+    # Scheduler de reglas recurrentes (RECURRING_INTERVAL=0 lo desactiva)
+    stop = asyncio.Event()
+    scheduler = asyncio.create_task(run_scheduler(stop)) if RECURRING_INTERVAL > 0 else None
+    yield
+    stop.set()
+    if scheduler is not None:
+        await scheduler
+    await dispose_engines()
 
 # Inicializar FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse if USE_ORJSON else JSONResponse)
 
 # Configuración CORS
 app.add_middleware(
@@ -20,13 +69,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Seeding al inicio
-@app.on_event("startup")
-def on_startup():
-    try:
-        seed_categories()
-    except Exception as e:
-        print(f"[WARNING] Could not seed categories: {e}")
+# Instrumentación SQL por request (SQL_METRICS_SAMPLE_RATE > 0)
+if SQL_METRICS_SAMPLE_RATE > 0:
+    app.add_middleware(SQLMetricsMiddleware)
+
+# Compresión GZip, sin el stream SSE de alertas
+if GZIP_MINIMUM_SIZE > 0:
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, exclude_paths=("/alerts/stream",))
 
 # Redirigir root a Swagger UI
 @app.get("/")
@@ -35,3 +84,7 @@ def main():
 
 # Incluir rutas
 app.include_router(routes)
+app.include_router(analytics)
+app.include_router(alerts)
+app.include_router(search)
+app.include_router(monitoring)
@@ -0,0 +1,50 @@
+from logging.config import fileConfig
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool
+
+load_dotenv()
+
+from app.dataBase.configuration import Base, dataBaseConnection
+import app.api.models.tablesSQL  # noqa: F401 - registers the models on Base.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+def include_name(name, type_, parent_names):
+    """Skip the SQLite FTS5 search tables (and their shadow tables), they are managed by migration 0008"""
+    return not (type_ == "table" and "_fts" in (name or ""))
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """FULLTEXT indexes are only created on MySQL"""
+    if type_ == "index" and not reflected and obj.dialect_options["mysql"].get("prefix") == "FULLTEXT":
+        return context.get_context().dialect.name == "mysql"
+    return True
+
+def run_migrations_offline():
+    """Emit the SQL instead of running it (`alembic upgrade head --sql`)"""
+    context.configure(url=dataBaseConnection, target_metadata=target_metadata, include_name=include_name, include_object=include_object, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Own short-lived engine, without the app pool and its instrumentation
+    connectable = create_engine(dataBaseConnection, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
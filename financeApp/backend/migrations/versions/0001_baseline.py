@@ -0,0 +1,64 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("full_name", sa.String(100), nullable=False),
+        sa.Column("birth_date", sa.Date(), nullable=False),
+        sa.Column("location", sa.String(100), nullable=False),
+        sa.Column("savings_goal", sa.Float(), nullable=False),
+        sa.Column("password", sa.String(255), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("description", sa.String(255), nullable=False),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+
+    op.create_table(
+        "incomes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("description", sa.String(255), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_incomes_id", "incomes", ["id"])
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.String(255), nullable=True),
+        sa.Column("value", sa.Float()),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("is_global", sa.Boolean()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+
+def downgrade():
+    op.drop_table("categories")
+    op.drop_table("incomes")
+    op.drop_table("expenses")
+    op.drop_table("users")
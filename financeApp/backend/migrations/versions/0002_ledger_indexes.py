@@ -0,0 +1,22 @@
+"""login and keyset pagination indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-06
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_users_full_name", "users", ["full_name"])
+    op.create_index("ix_expenses_user_date_id", "expenses", ["user_id", "date", "id"])
+    op.create_index("ix_incomes_user_date_id", "incomes", ["user_id", "date", "id"])
+
+def downgrade():
+    op.drop_index("ix_incomes_user_date_id", table_name="incomes")
+    op.drop_index("ix_expenses_user_date_id", table_name="expenses")
+    op.drop_index("ix_users_full_name", table_name="users")
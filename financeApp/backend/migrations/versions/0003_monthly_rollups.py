@@ -0,0 +1,43 @@
+"""monthly rollups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("kind", sa.String(10), nullable=False),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("user_id", "month", "kind", "category", name="uq_monthly_rollups_key"),
+    )
+    op.create_index("ix_monthly_rollups_id", "monthly_rollups", ["id"])
+    # Existing rows are summed in here, the same totals as app.seed.rebuild_rollups
+    month = {
+        "mysql": "date - INTERVAL (DAYOFMONTH(date) - 1) DAY",
+        "postgresql": "CAST(date_trunc('month', date) AS DATE)",
+    }.get(op.get_bind().dialect.name, "date(date, 'start of month')")
+    op.execute(
+        "INSERT INTO monthly_rollups (user_id, month, kind, category, total, count)"
+        f" SELECT user_id, {month}, 'expense', category, SUM(amount), COUNT(*) FROM expenses"
+        f" WHERE user_id IS NOT NULL GROUP BY user_id, {month}, category"
+        " UNION ALL"
+        f" SELECT user_id, {month}, 'income', '', SUM(amount), COUNT(*) FROM incomes"
+        f" WHERE user_id IS NOT NULL GROUP BY user_id, {month}"
+    )
+
+def downgrade():
+    op.drop_table("monthly_rollups")
@@ -0,0 +1,28 @@
+"""idempotency keys of /batch
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("key", sa.String(255), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+    op.create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"])
+
+def downgrade():
+    op.drop_table("idempotency_keys")
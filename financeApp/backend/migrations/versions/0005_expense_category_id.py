@@ -0,0 +1,34 @@
+"""expense category foreign key
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-01-06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("expenses") as batch:
+        batch.add_column(sa.Column("category_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key("fk_expenses_category_id", "categories", ["category_id"], ["id"], ondelete="SET NULL")
+    op.create_index("ix_expenses_user_category_date", "expenses", ["user_id", "category_id", "date"])
+    op.create_index("ix_categories_user_name", "categories", ["user_id", "name"])
+    # Same resolution as app/seed/backfill_category_ids.py (user categories win over globals)
+    op.execute(
+        "UPDATE expenses SET category_id = ("
+        " SELECT c.id FROM categories c"
+        " WHERE c.name = expenses.category AND (c.user_id = expenses.user_id OR c.user_id IS NULL)"
+        " ORDER BY c.user_id IS NULL, c.id LIMIT 1)"
+    )
+
+def downgrade():
+    op.drop_index("ix_categories_user_name", table_name="categories")
+    op.drop_index("ix_expenses_user_category_date", table_name="expenses")
+    with op.batch_alter_table("expenses") as batch:
+        batch.drop_constraint("fk_expenses_category_id", type_="foreignkey")
+        batch.drop_column("category_id")
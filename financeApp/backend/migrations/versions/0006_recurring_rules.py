@@ -0,0 +1,35 @@
+"""recurring rules
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-01-06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "recurring_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(10), nullable=False),
+        sa.Column("description", sa.String(255), nullable=False),
+        sa.Column("category", sa.String(100), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("frequency", sa.String(10), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("runs", sa.Integer(), nullable=False),
+        sa.Column("next_run", sa.Date(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_recurring_rules_id", "recurring_rules", ["id"])
+    op.create_index("ix_recurring_rules_active_next_run", "recurring_rules", ["active", "next_run"])
+
+def downgrade():
+    op.drop_table("recurring_rules")
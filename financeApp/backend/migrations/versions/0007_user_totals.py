@@ -0,0 +1,32 @@
+"""user totals
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-01-06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "user_totals",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("total_expenses", sa.Float(), nullable=False),
+        sa.Column("total_incomes", sa.Float(), nullable=False),
+    )
+    # Seeded from the rollups, which 0003 backfilled and the write paths kept current
+    op.execute(
+        "INSERT INTO user_totals (user_id, total_expenses, total_incomes)"
+        " SELECT user_id,"
+        " SUM(CASE WHEN kind = 'expense' THEN total ELSE 0 END),"
+        " SUM(CASE WHEN kind = 'income' THEN total ELSE 0 END)"
+        " FROM monthly_rollups GROUP BY user_id"
+    )
+
+def downgrade():
+    op.drop_table("user_totals")
@@ -0,0 +1,52 @@
+"""full-text search on descriptions
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-01-06
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+TABLES = ("expenses", "incomes")
+
+# SQLite keeps an external-content FTS5 table per ledger table, synced by triggers
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE {table}_fts USING fts5(
+        description, content='{table}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts (rowid, description) VALUES (new.id, new.description);
+    END""",
+    """CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    """CREATE TRIGGER {table}_fts_au AFTER UPDATE OF description ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO {table}_fts (rowid, description) VALUES (new.id, new.description);
+    END""",
+    "INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+]
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == "mysql":
+            op.create_index(f"ix_{table}_description_ft", table, ["description"], mysql_prefix="FULLTEXT")
+        elif dialect == "sqlite":
+            for statement in FTS_DDL:
+                op.execute(statement.format(table=table))
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == "mysql":
+            op.drop_index(f"ix_{table}_description_ft", table_name=table)
+        elif dialect == "sqlite":
+            for trigger in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{trigger}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
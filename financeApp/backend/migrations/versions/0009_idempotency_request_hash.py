@@ -0,0 +1,23 @@
+"""idempotency key request hash and expiry index
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-01-07
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("idempotency_keys") as batch:
+        batch.add_column(sa.Column("request_hash", sa.String(64), nullable=True))
+    op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"])
+
+def downgrade():
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys")
+    with op.batch_alter_table("idempotency_keys") as batch:
+        batch.drop_column("request_hash")
@@ -0,0 +1,77 @@
+"""Production entry point: uvicorn with N worker processes.
+
+    python server.py --workers 4 --port 8000
+
+Several workers need RESPONSE_CACHE_URL (the in-memory response cache is per
+process). Uses uvloop and httptools when they are installed. Run `alembic upgrade head`
+before starting the workers, the app does not create the schema.
+"""
+import os
+import logging
+import argparse
+from importlib.util import find_spec
+
+import uvicorn
+
+from app.utils.response_cache import RESPONSE_CACHE_URL
+
+logger = logging.getLogger("finance.server")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def available(module: str) -> bool:
+    return find_spec(module) is not None
+
+def check_multi_worker(workers: int) -> str | None:
+    """Error message when the configuration cannot run several workers; warns about per-worker state"""
+    if workers <= 1:
+        return None
+    from app.dataBase.configuration import dataBaseConnection
+    if not RESPONSE_CACHE_URL:
+        # A write only bumps the ETag versions of the worker that served it, the others would keep
+        # serving their cached payloads
+        return f"{workers} workers need a shared response cache: set RESPONSE_CACHE_URL or use --workers 1"
+    if dataBaseConnection.startswith("sqlite"):
+        logger.warning("%d workers on SQLite: FOR UPDATE SKIP LOCKED is unavailable, run the recurring "
+                       "scheduler in a single process (RECURRING_INTERVAL=0 on the others).", workers)
+    logger.warning("Alert streams (/alerts/stream) only receive events of writes handled by the same worker.")
+    return None
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY, else one per core when the response cache is shared, else a single worker"""
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.getenv("WEB_CONCURRENCY"))
+    return (os.cpu_count() or 1) if RESPONSE_CACHE_URL else 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE", 5)), help="idle keep-alive seconds")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", 30)),
+                        help="seconds to finish open requests (and close SSE streams) on shutdown")
+    args = parser.parse_args()
+
+    error = check_multi_worker(args.workers)
+    if error:
+        parser.error(error)
+    uvicorn.run(
+        "main:app",
+        app_dir=BACKEND_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if available("uvloop") else "asyncio",
+        http="httptools" if available("httptools") else "h11",
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time: point it at a throwaway SQLite file first
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+sys.path.insert(0, BACKEND_DIR)
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["DB_ASYNC"] = "false"
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("RECURRING_INTERVAL", "0")
+
+@pytest.fixture(scope="session")
+def database():
+    from app.dataBase.migrate import upgrade_database
+    from app.seed.seed_categories import seed_categories
+    # The deploy steps: migrations, then the global categories
+    upgrade_database()
+    seed_categories()
+    return DB_PATH
+
+@pytest.fixture
+def session_factory(database):
+    from app.dataBase.configuration import SessionLocal
+    return SessionLocal
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers(client):
+    """Sign up a user and return its Authorization header"""
+    def make(full_name: str) -> dict:
+        user = {"full_name": full_name, "birth_date": "2000-01-01", "location": "x", "savings_goal": 100, "password": "pw"}
+        assert client.post("/signup", json=user).status_code == 200
+        token = client.post("/login", data={"username": full_name, "password": "pw"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return make
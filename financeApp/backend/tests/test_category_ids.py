@@ -0,0 +1,51 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app.api.models.tablesSQL import Expense, Category
+from app.api.DTO.dtos import ExpenseDTOResponse, CategoryDTOResponse, BatchOperationDTO
+from app.api.services.ledger import create_item, update_item, delete_item
+from app.api.services.batch import apply_batch
+from app.api.services.categories import global_categories
+from tests.test_rollup_consistency import make_user, expense
+
+def category(name: str) -> dict:
+    return {"name": name, "description": None, "value": 0, "date": date(2024, 1, 1)}
+
+def category_ids(db, user_id: int) -> list:
+    return list(db.scalars(select(Expense.category_id).where(Expense.user_id == user_id).order_by(Expense.id)))
+
+def test_expenses_follow_category_create_rename_and_delete(session_factory):
+    db = session_factory()
+    user_id = make_user(db, "categories")
+    food = global_categories(db).ids_by_name["Food"]
+    create_item(db, Expense, ExpenseDTOResponse, expense(10), user_id)
+    assert category_ids(db, user_id) == [food]
+
+    own = create_item(db, Category, CategoryDTOResponse, category("Food"), user_id)
+    create_item(db, Expense, ExpenseDTOResponse, expense(20), user_id)
+    assert category_ids(db, user_id) == [own.id, own.id]
+
+    update_item(db, Category, CategoryDTOResponse, own.id, category("Groceries"), user_id)
+    assert category_ids(db, user_id) == [food, food]
+
+    create_item(db, Expense, ExpenseDTOResponse, expense(5, category="Groceries"), user_id)
+    assert category_ids(db, user_id) == [food, food, own.id]
+
+    delete_item(db, Category, own.id, user_id)
+    assert category_ids(db, user_id) == [food, food, None]
+    db.close()
+
+def test_batch_category_changes_repoint_expenses(session_factory):
+    db = session_factory()
+    user_id = make_user(db, "batch categories")
+    food = global_categories(db).ids_by_name["Food"]
+    create_item(db, Expense, ExpenseDTOResponse, expense(10), user_id)
+    operations = [BatchOperationDTO(op="create", resource="category", data={"name": "Food", "value": 0, "date": "2024-01-01"})]
+    response, _ = apply_batch(db, user_id, operations)
+    own_id = response.results[0].id
+    assert category_ids(db, user_id) == [own_id]
+
+    apply_batch(db, user_id, [BatchOperationDTO(op="delete", resource="category", id=own_id)])
+    assert category_ids(db, user_id) == [food]
+    db.close()
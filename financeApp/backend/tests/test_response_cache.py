@@ -0,0 +1,11 @@
+import pytest
+
+@pytest.mark.parametrize("url", ["/users/me", "/expenses", "/analytics/summary", "/search?q=rent"])
+def test_etag_of_another_user_never_matches(client, auth_headers, url):
+    alice, bob = auth_headers(f"alice {url}"), auth_headers(f"bob {url}")
+    etag = client.get(url, headers=alice).headers["etag"]
+
+    assert client.get(url, headers={**alice, "If-None-Match": etag}).status_code == 304
+    response = client.get(url, headers={**bob, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,85 @@
+import threading
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select, func
+
+from app.api.models.tablesSQL import User, Expense, MonthlyRollup, UserTotal
+from app.api.DTO.dtos import ExpenseDTOResponse
+from app.api.services.ledger import create_item, update_item, delete_item
+
+def make_user(db, name: str) -> int:
+    user = User(full_name=name, birth_date=date(2000, 1, 1), location="x", savings_goal=100, password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+def expense(amount: float, day: int = 1, category: str = "Food") -> dict:
+    return {"description": "e", "category": category, "amount": amount, "date": date(2024, 1, day)}
+
+def run_concurrently(session_factory, calls):
+    """Start every call at the same time, each on its own session"""
+    barrier = threading.Barrier(len(calls))
+    results, errors = [None] * len(calls), []
+    def worker(index, fn, args):
+        db = session_factory()
+        try:
+            barrier.wait()
+            results[index] = fn(db, *args)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+    threads = [threading.Thread(target=worker, args=(index, fn, args)) for index, (fn, args) in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
+
+def assert_rollups_match(db, user_id: int):
+    raw = db.execute(
+        select(Expense.date, Expense.category, func.sum(Expense.amount), func.count())
+        .where(Expense.user_id == user_id)
+        .group_by(Expense.date, Expense.category)
+    ).all()
+    expected = defaultdict(lambda: [0.0, 0])
+    for day, category, total, count in raw:
+        expected[(day.replace(day=1), category)][0] += total
+        expected[(day.replace(day=1), category)][1] += count
+    rollups = db.execute(
+        select(MonthlyRollup.month, MonthlyRollup.category, MonthlyRollup.total, MonthlyRollup.count)
+        .where(MonthlyRollup.user_id == user_id, MonthlyRollup.kind == "expense", MonthlyRollup.count != 0)
+    ).all()
+    assert {(month, category): [total, count] for month, category, total, count in rollups} == {
+        key: value for key, value in expected.items() if value[1]
+    }
+    total = db.scalar(select(UserTotal.total_expenses).where(UserTotal.user_id == user_id)) or 0.0
+    assert total == sum(value[0] for value in expected.values())
+
+def test_concurrent_deletes_subtract_once(session_factory):
+    db = session_factory()
+    user_id = make_user(db, "deletes")
+    kept = create_item(db, Expense, ExpenseDTOResponse, expense(267), user_id)
+    target = create_item(db, Expense, ExpenseDTOResponse, expense(100, day=2), user_id)
+    assert kept and target
+
+    results = run_concurrently(session_factory, [(delete_item, (Expense, target.id, user_id))] * 4)
+
+    assert sorted(results) == [False, False, False, True]
+    assert_rollups_match(db, user_id)
+    db.close()
+
+def test_concurrent_updates_and_delete_keep_rollups_exact(session_factory):
+    db = session_factory()
+    user_id = make_user(db, "updates")
+    target = create_item(db, Expense, ExpenseDTOResponse, expense(100), user_id)
+    create_item(db, Expense, ExpenseDTOResponse, expense(50, day=3, category="Rent"), user_id)
+
+    calls = [(update_item, (Expense, ExpenseDTOResponse, target.id, expense(10 * n, day=n, category=f"C{n % 2}"), user_id)) for n in range(1, 7)]
+    calls.append((delete_item, (Expense, target.id, user_id)))
+    run_concurrently(session_factory, calls)
+
+    assert_rollups_match(db, user_id)
+    db.close()